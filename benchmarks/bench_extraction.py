@@ -0,0 +1,67 @@
+"""
+Benchmark of request parameters extraction.
+
+Compares generic extraction (extractors called one by one) with parser generated
+by `codegen.make_sync_parser` for handler with path and several query parameters.
+
+Run from the root of the project:
+
+    python benchmarks/bench_extraction.py
+"""
+
+import asyncio
+import time
+import uuid
+
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_openapi import Param
+from aiohttp_openapi.parser import codegen, decorators, func_inspector
+
+ROUNDS = 50_000
+
+
+async def list_notes(
+    owner_id=Param(uuid.UUID),
+    offset=Param(int),
+    limit=Param(25),
+    title=Param(str, ""),
+    sort=Param("created"),
+    created_after=Param(str, None),
+    archived=Param(int, 0),
+):
+    pass
+
+
+def make_request():
+    owner_id = uuid.uuid4()
+    request = make_mocked_request(
+        "GET",
+        f"/owners/{owner_id}/notes?offset=10&limit=50&title=abc&sort=title&x=1&y=2",
+        match_info={"owner_id": str(owner_id)},
+    )
+    return request
+
+
+async def run(plan, request):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await decorators._extract_arguments(request, plan)
+    return time.perf_counter() - start
+
+
+def main():
+    plan = func_inspector.make_extraction_plan(list_notes, {"owner_id"})
+    compiled_plan = plan._replace(sync_parser=codegen.make_sync_parser(plan))
+    request = make_request()
+    loop = asyncio.new_event_loop()
+    generic = loop.run_until_complete(run(plan, request))
+    compiled = loop.run_until_complete(run(compiled_plan, request))
+    loop.close()
+    print(f"generic:  {generic / ROUNDS * 1e6:.2f} us/request")
+    print(f"compiled: {compiled / ROUNDS * 1e6:.2f} us/request")
+    print(f"speedup:  {generic / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
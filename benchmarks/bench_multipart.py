@@ -0,0 +1,101 @@
+"""
+Benchmark of multipart body extraction.
+
+Measures parts per second extracted by `MultiPart` from body with JSON, text
+and binary parts.
+
+Run from the root of the project:
+
+    python benchmarks/bench_multipart.py
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pydantic
+from aiohttp import streams
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_openapi import FileUpload, Json, MultiPart, Text
+
+ROUNDS = 5_000
+
+
+class Author(pydantic.BaseModel):
+    name: str
+    age: int
+
+
+EXTRACTOR = MultiPart(
+    author=Json(Author),
+    biography=Text(),
+    avatar=FileUpload(),
+    signature=Text(""),
+)
+
+
+def make_body():
+    with aiohttp.MultipartWriter("form-data") as writer:
+        part = writer.append_json({"name": "Jane", "age": 42})
+        part.set_content_disposition("form-data", name="author")
+        part = writer.append("Born somewhere, lives elsewhere.")
+        part.set_content_disposition("form-data", name="biography")
+        part = writer.append(b"\x89PNG" + b"\x00" * 1024)
+        part.set_content_disposition("form-data", name="avatar", filename="a.png")
+
+    class Buffer:
+        def __init__(self):
+            self.data = b""
+
+        async def write(self, data):
+            self.data += data
+
+    buffer = Buffer()
+    asyncio.run(writer.write(buffer))
+    return buffer.data, writer.headers[aiohttp.hdrs.CONTENT_TYPE], len(writer)
+
+
+class Protocol:
+    """Stub of protocol, mock would dominate timings."""
+
+    _reading_paused = False
+
+    def pause_reading(self, **kwargs):
+        pass
+
+    def resume_reading(self, **kwargs):
+        pass
+
+
+def make_request(body, content_type):
+    payload = streams.StreamReader(Protocol(), 2**16, loop=asyncio.get_running_loop())
+    payload.feed_data(body)
+    payload.feed_eof()
+    return make_mocked_request(
+        "POST",
+        "/authors",
+        headers={aiohttp.hdrs.CONTENT_TYPE: content_type},
+        payload=payload,
+    )
+
+
+async def run(body, content_type):
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        request = make_request(body, content_type)
+        start = time.perf_counter()
+        await EXTRACTOR.extract(request)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main():
+    body, content_type, parts = make_body()
+    elapsed = asyncio.run(run(body, content_type))
+    print(f"{elapsed / ROUNDS * 1e6:.2f} us/request")
+    print(f"{ROUNDS * parts / elapsed:,.0f} parts/s")
+
+
+if __name__ == "__main__":
+    main()
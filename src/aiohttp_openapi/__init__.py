@@ -1,19 +1,29 @@
 import logging
 
+from .cache import TTLCache
+from .compression import CompressionPolicy
 from .main import SchemaController, publish_schema
 from .parser.decorators import openapi_view
 from .parser.extractors import (
     Cookie,
     FileUpload,
     FileUploadReader,
+    FileUploadTee,
     Header,
     Json,
+    JsonStream,
+    MsgPack,
     MultiPart,
     MultiPartReader,
     MultipleFileUpload,
+    Negotiated,
     Param,
+    SpooledFile,
     Text,
 )
+from .parser.parsers import register_parser
+from .responses import make_response
+from .settings import configure
 
 __all__ = (
     "openapi_view",
@@ -25,12 +35,22 @@ __all__ = (
     "Header",
     "Cookie",
     "Json",
+    "JsonStream",
     "Text",
     "FileUpload",
     "FileUploadReader",
+    "FileUploadTee",
     "MultipleFileUpload",
     "MultiPartReader",
     "MultiPart",
+    "MsgPack",
+    "Negotiated",
+    "SpooledFile",
+    "register_parser",
+    "configure",
+    "make_response",
+    "CompressionPolicy",
+    "TTLCache",
 )
 
 VERSION = "0.0.2"
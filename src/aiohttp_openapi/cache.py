@@ -0,0 +1,293 @@
+"""
+Caches of responses of `openapi_view` handlers.
+
+Key of cached response is made of the handler, values of its extracted
+arguments and format of response, so handler is not called while its response
+for the same arguments is in cache. Responses are stored encoded, hits cost no
+serialization. Compressed bodies are stored with the same handler and arguments
+and encoding in variant of key.
+
+`SingleFlight` shares one call of handler among identical concurrent requests.
+"""
+
+import abc
+import asyncio
+import collections
+import collections.abc
+import functools
+import time
+import typing as t
+
+import pydantic
+from aiohttp import hdrs, web
+
+# Headers that are set again for every response
+_SKIPPED_HEADERS = frozenset((hdrs.CONTENT_LENGTH, hdrs.DATE, hdrs.SERVER))
+
+
+class CachedResponse(t.NamedTuple):
+    """Encoded response without compression."""
+
+    status: int
+    body: bytes
+    headers: t.Tuple[t.Tuple[str, str], ...]
+
+    @classmethod
+    def from_response(cls, response: web.Response) -> "CachedResponse":
+        headers = tuple(
+            (name, value)
+            for name, value in response.headers.items()
+            if name not in _SKIPPED_HEADERS
+        )
+        return cls(response.status, bytes(response.body), headers)
+
+    def to_response(self) -> web.Response:
+        return web.Response(status=self.status, body=self.body, headers=self.headers)
+
+
+class CacheStats(t.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    bytes: int
+
+
+class CacheKey(t.NamedTuple):
+    handler: t.Callable
+    arguments: t.Tuple[t.Tuple[str, t.Hashable], ...]
+    variant: t.Hashable  # e.g. negotiated content type
+
+
+class _Entry(t.NamedTuple):
+    response: CachedResponse
+    expires: float
+
+
+class ResponseCache(abc.ABC):
+    """Base class of caches given to `openapi_view(cache=...)`."""
+
+    @abc.abstractmethod
+    def get(self, key: CacheKey) -> t.Optional[CachedResponse]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set(self, key: CacheKey, response: CachedResponse):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def invalidate(self, view: t.Callable = None, **arguments) -> int:
+        """Remove responses of view (of any view by default) for arguments."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self):
+        raise NotImplementedError
+
+    def check_handler(self, handler: t.Callable):
+        """Raise UnacceptableSignature if responses of handler can not be cached."""
+
+    @property
+    @abc.abstractmethod
+    def stats(self) -> CacheStats:
+        raise NotImplementedError
+
+
+class TTLCache(ResponseCache):
+    """
+    In-process cache with LRU eviction and expiration of responses.
+
+    Arguments:
+        maxsize: maximal amount of cached responses.
+        ttl: seconds response is kept for, None means until it is evicted.
+        max_bytes: maximal total size of cached bodies, larger responses are
+            not cached.
+
+    Cache may be shared by several views, e.g. to invalidate them together.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, max_bytes: int = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize should be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: t.OrderedDict[CacheKey, _Entry] = collections.OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(maxsize={self.maxsize}, ttl={self.ttl}, "
+            f"max_bytes={self.max_bytes})"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self.hits, self.misses, self.evictions, len(self._entries), self._bytes
+        )
+
+    def get(self, key: CacheKey) -> t.Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires < time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.response
+
+    def set(self, key: CacheKey, response: CachedResponse):
+        size = len(response.body)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._pop(key)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = _Entry(response, expires)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, view: t.Callable = None, **arguments) -> int:
+        """
+        Remove responses of view (of any view by default) for given arguments.
+
+        Arguments are python names of handler parameters, responses for any
+        values of omitted arguments are removed, e.g. `invalidate(list_notes)`
+        removes all pages of notes. Returns amount of removed responses.
+        """
+        handler = _get_openapi_handler(view) if view is not None else None
+        frozen = {name: _freeze(value) for name, value in arguments.items()}
+        keys = [
+            key
+            for key in self._entries
+            if (handler is None or key.handler is handler)
+            and _match_arguments(key.arguments, frozen)
+        ]
+        for key in keys:
+            self._pop(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _pop(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.response.body)
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at once, concurrent callers share its result.
+
+    Call runs in separate task, so it goes on when the caller which started it
+    is cancelled while others wait. It is cancelled when nobody waits for it.
+    """
+
+    def __init__(self):
+        self._flights: t.Dict[t.Hashable, _Flight] = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def run(
+        self, key: t.Hashable, call: t.Callable[[], t.Awaitable]
+    ) -> t.Tuple[t.Any, bool]:
+        """Return result of `call` or of the same call in flight, and if it ran."""
+        flight = self._flights.get(key)
+        started = flight is None
+        if started:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(functools.partial(self._land, key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), started
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Callers that come later start new flight
+                self._land(key, flight)
+                flight.task.cancel()
+
+    def _land(self, key, flight: _Flight, task=None):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+def make_key(
+    handler: t.Callable, arguments: t.Mapping[str, t.Any], variant=None
+) -> t.Optional[CacheKey]:
+    """
+    Return key of response for arguments of handler.
+
+    None means that response can not be cached, e.g. some argument is stream.
+    Request is not part of key, so `openapi_view` does not allow to cache
+    handlers that receive it.
+    """
+    try:
+        frozen = tuple((name, _freeze(value)) for name, value in arguments.items())
+        hash(frozen)
+    except TypeError:
+        return None
+    return CacheKey(handler, frozen, variant)
+
+
+def _freeze(value) -> t.Hashable:
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    if isinstance(value, collections.abc.AsyncIterable):
+        raise TypeError(f"{type(value).__name__} can not be part of cache key")
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(map(_freeze, value))
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, pydantic.BaseModel):
+        return (type(value), _freeze(value.dict()))
+    return value
+
+
+def _match_arguments(arguments, expected: t.Mapping[str, t.Hashable]) -> bool:
+    if not expected:
+        return True
+    matched = 0
+    for name, value in arguments:
+        if name in expected:
+            if expected[name] != value:
+                return False
+            matched += 1
+    return matched == len(expected)
+
+
+def _get_openapi_handler(view):
+    # The innermost function marked by openapi_view, wrappers copy the mark
+    handler, func = None, view
+    while func is not None:
+        if getattr(func, "_is_openapi_handler", False):
+            handler = func
+        func = getattr(func, "__wrapped__", None)
+    if handler is None:
+        raise ValueError(f"{view!r} is not made by openapi_view")
+    return handler
@@ -0,0 +1,98 @@
+"""
+Encoders and decoders of request and response bodies.
+
+Encoder or decoder can be given by name of known library or as any callable.
+Libraries other than stdlib are optional and imported only when requested.
+"""
+
+import functools
+import importlib
+import json
+import typing as t
+
+try:
+    from pydantic.json import pydantic_encoder as _encode_default  # pydantic v1
+except ImportError:  # pydantic v2
+    from pydantic_core import to_jsonable_python as _encode_default
+
+JsonLoads = t.Callable[[bytes], t.Any]
+JsonDumps = t.Callable[[t.Any], bytes]
+
+_JSON_LOADS_MODULES = {
+    "stdlib": "json",
+    "json": "json",
+    "orjson": "orjson",
+    "ujson": "ujson",
+}
+
+
+def get_json_loads(loads: t.Union[str, JsonLoads]) -> JsonLoads:
+    """
+    Return function that decodes JSON document from bytes.
+
+    `loads` is either a callable or one of names: "stdlib", "orjson", "ujson".
+    """
+    if callable(loads):
+        return loads
+    try:
+        module_name = _JSON_LOADS_MODULES[loads]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JSON decoder {loads!r}, "
+            f"expected callable or one of {list(_JSON_LOADS_MODULES)}"
+        )
+    if module_name == "json":
+        return json.loads
+    return importlib.import_module(module_name).loads
+
+
+def get_json_dumps(dumps: t.Union[str, JsonDumps]) -> JsonDumps:
+    """
+    Return function that encodes value to JSON document in bytes.
+
+    `dumps` is either a callable or one of names: "stdlib", "orjson", "ujson".
+    Encoders returned for names support the same types as `json_dumps`.
+    """
+    if callable(dumps):
+        return dumps
+    try:
+        module_name = _JSON_LOADS_MODULES[dumps]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JSON encoder {dumps!r}, "
+            f"expected callable or one of {list(_JSON_LOADS_MODULES)}"
+        )
+    if module_name == "json":
+        return json_dumps
+    module = importlib.import_module(module_name)
+    if module_name == "orjson":
+        return functools.partial(module.dumps, default=_encode_default)
+
+    def ujson_dumps(value) -> bytes:
+        return module.dumps(value, default=_encode_default).encode()
+
+    return ujson_dumps
+
+
+def json_dumps(value) -> bytes:
+    """Encode value to JSON, pydantic models, dates, UUIDs etc. are supported."""
+    return json.dumps(value, default=_encode_default).encode()
+
+
+def msgpack_loads(body: bytes):
+    """Decode MessagePack document, requires `msgpack` package."""
+    return _import_msgpack().unpackb(body)
+
+
+def msgpack_dumps(value) -> bytes:
+    """Encode value to MessagePack, types are supported as in `json_dumps`."""
+    return _import_msgpack().packb(value, default=_encode_default)
+
+
+def _import_msgpack():
+    try:
+        return importlib.import_module("msgpack")
+    except ImportError as e:
+        raise ImportError(
+            "MessagePack support requires `msgpack` package: pip install msgpack"
+        ) from e
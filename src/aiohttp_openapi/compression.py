@@ -0,0 +1,173 @@
+"""
+Compression of responses negotiated with client by `Accept-Encoding` header.
+
+Policy is set for application by `configure(app, compression=...)` and may be
+overridden in `openapi_view`. Small responses are compressed inline, large
+ones in thread pool, so event loop is not blocked.
+"""
+
+import asyncio
+import dataclasses
+import typing as t
+import zlib
+
+from aiohttp import hdrs, web
+
+from . import settings
+from .responses import _parse_accept
+
+ENCODINGS = ("gzip", "deflate")
+
+# wbits of zlib.compressobj for content coding
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+@dataclasses.dataclass(frozen=True)
+class CompressionPolicy:
+    """
+    Attributes:
+        min_bytes: smaller responses are sent uncompressed.
+        encodings: allowed content codings in order of preference.
+        level: zlib compression level, from 1 (fast) to 9 (small).
+        executor_bytes: larger responses are compressed in thread pool.
+    """
+
+    min_bytes: int = 1024
+    encodings: t.Tuple[str, ...] = ENCODINGS
+    level: int = 6
+    executor_bytes: int = 2**18
+
+    def __post_init__(self):
+        unknown = set(self.encodings) - set(ENCODINGS)
+        if unknown:
+            raise ValueError(
+                f"Unknown encodings {sorted(unknown)}, expected some of {ENCODINGS}"
+            )
+
+
+def get_policy(policy) -> t.Optional[CompressionPolicy]:
+    """Return policy given as option: True means default policy, False - none."""
+    if policy is True:
+        return CompressionPolicy()
+    return policy or None
+
+
+def negotiate_encoding(
+    request: web.Request, encodings: t.Sequence[str] = ENCODINGS
+) -> t.Optional[str]:
+    """
+    Return one of `encodings` preferred by client, None for identity.
+
+    `*` stands for encodings that are not listed explicitly, e.g. gzip is never
+    chosen for `gzip;q=0, *`.
+    """
+    accept_encoding = request.headers.get(hdrs.ACCEPT_ENCODING)
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for coding, quality in _parse_accept(accept_encoding):
+        qualities.setdefault(coding, quality)
+    best, best_quality = None, 0.0
+    for coding, quality in qualities.items():
+        if coding == "*":
+            coding = next((e for e in encodings if e not in qualities), None)
+        elif coding not in encodings:
+            continue
+        if coding is not None and quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    compressor = zlib.compressobj(level, wbits=_WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+async def compress_body(body: bytes, encoding: str, policy: CompressionPolicy):
+    """Compress body, in thread pool if it is larger than `executor_bytes`."""
+    if len(body) < policy.executor_bytes:
+        return compress(body, encoding, policy.level)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, compress, body, encoding, policy.level)
+
+
+async def compress_response(
+    request: web.Request, response: web.Response, policy: CompressionPolicy
+) -> web.Response:
+    """Compress body of response in place if client accepts compression."""
+    add_vary(response.headers)
+    encoding = get_response_encoding(request, response, policy)
+    if encoding is None:
+        return response
+    response.body = await compress_body(response.body, encoding, policy)
+    response.headers[hdrs.CONTENT_ENCODING] = encoding
+    return response
+
+
+def get_response_encoding(
+    request: web.Request, response: web.Response, policy: CompressionPolicy
+) -> t.Optional[str]:
+    """Return encoding response should be compressed with, None if it should not."""
+    body = response.body
+    if not isinstance(body, (bytes, bytearray)) or len(body) < policy.min_bytes:
+        return None
+    if hdrs.CONTENT_ENCODING in response.headers:
+        return None
+    return negotiate_encoding(request, policy.encodings)
+
+
+def get_request_policy(request: web.Request, policy=None):
+    """Return policy of view or application, `policy=False` disables it."""
+    if policy is None:
+        policy = settings.get_settings(request).compression
+    return get_policy(policy)
+
+
+class StaticResponse:
+    """
+    Handler of response that never changes, e.g. published schema.
+
+    Body is compressed once for every encoding requested by clients.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        content_type: str,
+        policy: CompressionPolicy = None,
+    ):
+        self.body = body
+        self.content_type = content_type
+        self.policy = policy or CompressionPolicy()
+        self._bodies: t.Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, request: web.Request) -> web.Response:
+        headers = {}
+        add_vary(headers)
+        body = self.body
+        encoding = None
+        if len(body) >= self.policy.min_bytes:
+            encoding = negotiate_encoding(request, self.policy.encodings)
+        if encoding is not None:
+            body = await self._get_compressed(encoding)
+            headers[hdrs.CONTENT_ENCODING] = encoding
+        return web.Response(body=body, content_type=self.content_type, headers=headers)
+
+    async def _get_compressed(self, encoding: str) -> bytes:
+        # Concurrent requests wait for the same compression
+        compressed = self._bodies.get(encoding)
+        if compressed is None:
+            compressed = asyncio.ensure_future(
+                compress_body(self.body, encoding, self.policy)
+            )
+            self._bodies[encoding] = compressed
+        return await asyncio.shield(compressed)
+
+
+def add_vary(headers):
+    """Add Accept-Encoding to Vary header, responses differ by it."""
+    vary = headers.get(hdrs.VARY)
+    if not vary:
+        headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+    elif hdrs.ACCEPT_ENCODING.lower() not in vary.lower():
+        headers[hdrs.VARY] = f"{vary}, {hdrs.ACCEPT_ENCODING}"
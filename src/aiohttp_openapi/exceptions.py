@@ -19,6 +19,9 @@ class UnacceptableSignature(AiohttpOpenapiException, TypeError):
 
 
 class ValidationError(AiohttpOpenapiException):
+    # HTTP status of response with errors, None means status chosen by handler.
+    status = None
+
     def __init__(self, param_name, location, original_exc=None):
         self.param_name = param_name
         self.location = location
@@ -26,9 +29,11 @@ class ValidationError(AiohttpOpenapiException):
 
     def errors(self):
         if isinstance(self.original_exc, pydantic.ValidationError):
-            errors = self.original_exc.errors()
+            errors = [_normalize_error(e) for e in self.original_exc.errors()]
             for e in errors:
                 e["in"] = self.location.value
+                if not e["loc"]:  # invalid JSON on pydantic v2
+                    e["loc"] = (self.param_name,)
             return errors
         else:
             return [
@@ -52,6 +57,21 @@ class ValidationError(AiohttpOpenapiException):
         return type(self.original_exc).__name__
 
 
+def _normalize_error(error: dict) -> dict:
+    """
+    Return error of pydantic with keys of pydantic v1 errors.
+
+    Pydantic v2 adds `url` and `input` keys and may put exceptions into `ctx`.
+    """
+    normalized = {"loc": error["loc"], "msg": error["msg"], "type": error["type"]}
+    if "ctx" in error:
+        normalized["ctx"] = {
+            name: value if isinstance(value, (str, int, float, bool)) else str(value)
+            for name, value in error["ctx"].items()
+        }
+    return normalized
+
+
 class MissingValueError(ValidationError):
     @property
     def msg(self):
@@ -68,6 +88,80 @@ class WrongValueError(ValidationError):
     pass
 
 
+class ItemValidationError(WrongValueError):
+    """
+    Raised when item of streamed body is invalid.
+
+    `param_name` is index of the item, it starts `loc` of every error.
+    """
+
+    def errors(self):
+        errors = super().errors()
+        if isinstance(self.original_exc, pydantic.ValidationError):
+            for e in errors:
+                e["loc"] = (self.param_name, *e["loc"])
+        return errors
+
+
+class LimitExceededError(ValidationError):
+    """Raised when request is too large or too complex to be processed."""
+
+    def __init__(self, param_name, location, msg):
+        super().__init__(param_name, location)
+        self._msg = msg
+
+    @property
+    def msg(self):
+        return self._msg
+
+    @property
+    def type_(self):
+        return type(self).__name__
+
+
+class PayloadTooLargeError(LimitExceededError):
+    status = 413
+
+
+class UnsupportedMediaTypeError(ValidationError):
+    """Raised when body has `Content-Type` extractor can not decode."""
+
+    status = 415
+
+    def __init__(self, param_name, location, content_type, expected):
+        super().__init__(param_name, location)
+        self.content_type = content_type
+        self.expected = expected
+
+    @property
+    def msg(self):
+        return "Content-Type {!r} is not supported, expected one of {}".format(
+            self.content_type, ", ".join(self.expected)
+        )
+
+    @property
+    def type_(self):
+        return type(self).__name__
+
+
+class UnsupportedEncodingError(ValidationError):
+    """Raised when body has `Content-Encoding` extractor can not decode."""
+
+    status = 415
+
+    def __init__(self, param_name, location, encoding):
+        super().__init__(param_name, location)
+        self.encoding = encoding
+
+    @property
+    def msg(self):
+        return f"Content-Encoding {self.encoding!r} is not supported"
+
+    @property
+    def type_(self):
+        return type(self).__name__
+
+
 """
     [
       {
@@ -18,6 +18,8 @@ except ImportError:
 
 from swagger_ui import aiohttp_api_doc
 
+from . import settings
+from .compression import StaticResponse, get_policy
 from .openapi.schema import SchemaMaker
 
 
@@ -72,8 +74,26 @@ class SchemaController:
         schema_path: PathLike = None,
         url_path: str = "/api/doc",
         title: str = None,
+        compression=None,
         **api_doc_kwargs,
     ):
+        """
+        Serve page with schema, `compression` policy defaults to application's.
+
+        With compression schema is encoded and compressed only once.
+        """
+        if compression is None:
+            app_settings = self.app.get(
+                settings.SETTINGS_KEY, settings.DEFAULT_SETTINGS
+            )
+            compression = app_settings.compression
+        policy = get_policy(compression)
+        if schema is not None and policy is not None:
+            json_url = api_doc_kwargs.setdefault("config_rel_url", "/swagger.json")
+            handler = StaticResponse(
+                json.dumps(schema).encode(), "application/json", policy
+            )
+            self.app.router.add_get(url_path.rstrip("/") + json_url, handler)
         kwargs = dict(
             title=title if title is not None else self.title,
             config=schema,
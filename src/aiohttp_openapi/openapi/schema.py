@@ -1,15 +1,14 @@
 """Module related to OpenAPI Schema."""
 
 import collections
-import datetime
 import enum
 import logging
 import typing as t
-import uuid
 
 from aiohttp import hdrs, web
 
-from aiohttp_openapi.parser import decorators, extractors
+from aiohttp_openapi import compression, responses, settings
+from aiohttp_openapi.parser import decorators, extractors, parsers
 
 from . import struct
 
@@ -17,6 +16,7 @@ DEFAULT_NO_BODY_STATUS = 204
 DEFAULT_WITH_BODY_STATUS = 200
 DEFAULT_DESCRIPTION = ""
 DEFAULT_NO_BODY_DESCRITPTION = "OK"
+NOT_MODIFIED_DESCRIPTION = "Not modified since version in If-None-Match header"
 
 
 def make_schema(app: web.Application, title: str, version: str):
@@ -65,12 +65,12 @@ class SchemaMaker:
         path_item = struct.PathItemObject()
         for route in routes:
             for method, route_info in decorators.gen_routes_info(route):
-                operation_obj = self._build_operation_object(route_info)
+                operation_obj = self._build_operation_object(route_info, method)
                 setattr(path_item, method.lower(), operation_obj)
         return path_item
 
     def _build_operation_object(
-        self, route_info: decorators.RouteInfo
+        self, route_info: decorators.RouteInfo, method: str
     ) -> struct.OperationObject:
         operation_parameters = []
         request_body = None
@@ -78,22 +78,37 @@ class SchemaMaker:
             if isinstance(extractor, extractors.Body):
                 schema = self._make_schema_for_body(extractor)
                 request_body = struct.RequestBodyObject(
-                    content={extractor._content_: struct.MediaTypeObject(schema=schema)}
+                    content={
+                        content_type: struct.MediaTypeObject(schema=schema)
+                        for content_type in extractor.content_types
+                    }
                 )
+                if extractor._decompress_ and self._get_settings().decompress:
+                    operation_parameters.append(self._make_content_encoding_param())
             else:
-                operation_parameters.append(
-                    struct.SimpleParameterObject(
-                        name=extractor.alias or param_name,
-                        in_=struct.InEnum[extractor._in_.name],
-                        required=extractor.required,
-                        schema_=self._make_schema_for_param(extractor),
-                        **extractor.extra,
+                parameter_fields = dict(
+                    name=extractor.alias or param_name,
+                    in_=struct.InEnum[extractor._in_.name],
+                    required=extractor.required,
+                    schema_=self._make_schema_for_param(extractor),
+                    **extractor.extra,
+                )
+                if extractor.item_type is not None:
+                    parameter_fields.update(
+                        style=extractor.style, explode=extractor.explode
                     )
+                operation_parameters.append(
+                    struct.SimpleParameterObject(**parameter_fields)
                 )
 
+        # ETag is set and checked only for GET and HEAD requests
+        conditional = method in decorators._CONDITIONAL_METHODS
+        if route_info.meta.etag and conditional:
+            operation_parameters.append(self._make_if_none_match_param())
+
         inspect_info = route_info.inspect_info
         responses = self._build_responses_object(
-            route_info.meta, inspect_info.return_type
+            route_info.meta, inspect_info.return_type, conditional
         )
         if inspect_info.docstring:
             summary_description = inspect_info.docstring.split("\n\n", 1)
@@ -113,8 +128,32 @@ class SchemaMaker:
             operation_obj.requestBody = request_body
         return operation_obj
 
+    def _get_settings(self) -> settings.Settings:
+        return self.app.get(settings.SETTINGS_KEY, settings.DEFAULT_SETTINGS)
+
+    def _make_content_encoding_param(self) -> struct.SimpleParameterObject:
+        return struct.SimpleParameterObject(
+            name=hdrs.CONTENT_ENCODING,
+            in_=struct.InEnum.header,
+            required=False,
+            schema_={
+                "type": "string",
+                "enum": ["identity", *extractors.DECOMPRESSED_ENCODINGS],
+            },
+            description="Request body may be compressed",
+        )
+
+    def _make_if_none_match_param(self) -> struct.SimpleParameterObject:
+        return struct.SimpleParameterObject(
+            name=hdrs.IF_NONE_MATCH,
+            in_=struct.InEnum.header,
+            required=False,
+            schema_={"type": "string"},
+            description="ETag of cached response, 304 is returned if it is current",
+        )
+
     def _build_responses_object(
-        self, response_meta, return_type
+        self, response_meta, return_type, conditional: bool
     ) -> struct.ResponseObject:
         response_status = response_meta.response_status
         description = response_meta.response_description
@@ -128,8 +167,17 @@ class SchemaMaker:
             description = DEFAULT_DESCRIPTION
 
         response_object = struct.ResponseObject(description=description)
+        etag = response_meta.etag and conditional
+        cache_headers = self._make_cache_headers(response_meta, etag)
+        if cache_headers:
+            response_object.headers = cache_headers
+        extra_responses = {}
+        if etag:
+            extra_responses["304"] = struct.ResponseObject(
+                description=NOT_MODIFIED_DESCRIPTION, headers=cache_headers
+            )
         contentless_responses = struct.ResponsesObject.parse_obj(
-            {str(response_status): response_object}
+            {str(response_status): response_object, **extra_responses}
         )
         if return_type in (None, web.Response):
             return contentless_responses
@@ -143,23 +191,62 @@ class SchemaMaker:
             )
             return contentless_responses
         response_object.content = {
-            response_meta.content_type.value: struct.MediaTypeObject(schema=schema)
+            content_type.value: struct.MediaTypeObject(schema=schema)
+            for content_type in response_meta.content_types
         }
-        return struct.ResponsesObject.parse_obj({str(response_status): response_object})
+        return struct.ResponsesObject.parse_obj(
+            {str(response_status): response_object, **extra_responses}
+        )
+
+    def _make_cache_headers(
+        self, response_meta, etag: bool
+    ) -> t.Dict[str, struct.SimpleHeaderObject]:
+        headers = {}
+        if etag:
+            headers["ETag"] = struct.SimpleHeaderObject(
+                schema_={"type": "string"}, description="Version of response"
+            )
+        if response_meta.max_age is not None:
+            headers[hdrs.CACHE_CONTROL] = struct.SimpleHeaderObject(
+                schema_={"type": "string"},
+                example=f"max-age={response_meta.max_age}",
+            )
+        if vary := self._get_vary(response_meta):
+            headers[hdrs.VARY] = struct.SimpleHeaderObject(
+                schema_={"type": "string"}, example=vary
+            )
+        return headers
+
+    def _get_vary(self, response_meta) -> t.Optional[str]:
+        """Return Vary header of responses as it is set by handler."""
+        headers = responses.make_cache_headers(
+            None, response_meta.vary, negotiated=len(response_meta.content_types) > 1
+        )
+        policy = response_meta.compression
+        if policy is None:
+            policy = self._get_settings().compression
+        if compression.get_policy(policy) is not None:
+            compression.add_vary(headers)
+        return headers.get(hdrs.VARY)
 
     def _build_components_object(self) -> t.Optional[struct.ComponentsObject]:
         if self.used_schemas:
             return struct.ComponentsObject(schemas=self.used_schemas)
 
     def _make_schema_for_param(self, extractor):
-        schema = self._get_schema_for_enum(extractor.parser)
-        if schema is not None:
+        if extractor.item_type is not None:
+            schema = {
+                "type": "array",
+                "items": self._make_schema_for_param_value(extractor.item_type),
+            }
             if extractor.has_schema_default:
-                schema["default"] = extractor.default.value
+                schema["default"] = [
+                    _get_schema_value(item) for item in extractor.default
+                ]
         else:
-            schema = self._make_schema_for_primitive(extractor.parser)
+            schema = self._make_schema_for_param_value(extractor.parser)
             if extractor.has_schema_default:
-                schema["default"] = extractor.default
+                schema["default"] = _get_schema_value(extractor.default)
         extra = {
             k: extractor.extra[k]
             for k in extractor.extra
@@ -170,9 +257,13 @@ class SchemaMaker:
         schema_obj = struct.SchemaObject.parse_obj(schema)
         return schema_obj.dict()
 
+    def _make_schema_for_param_value(self, cls):
+        return self._get_schema_for_enum(cls) or self._make_schema_for_primitive(cls)
+
     def _make_schema_for_body(self, extractor):
         return (
             self._get_schema_for_multipart(extractor)
+            or self._get_schema_for_stream(extractor)
             or self._get_schema_for_pydantic(extractor.parser)
             or self._make_schema_for_primitive(extractor.parser)
         )
@@ -189,6 +280,14 @@ class SchemaMaker:
             },
         }
 
+    def _get_schema_for_stream(self, extractor):
+        if not isinstance(extractor, extractors.JsonStream):
+            return None
+        item_schema = self._get_schema_for_pydantic(
+            extractor.parser
+        ) or self._make_schema_for_primitive(extractor.parser)
+        return {"type": "array", "items": item_schema}
+
     def _get_schema_for_pydantic(self, cls):
         if not extractors._is_pydantic_model(cls):
             return None
@@ -201,9 +300,12 @@ class SchemaMaker:
 
     def _get_schema_for_generic(self, cls):
         generic_type = t.get_origin(cls)
-        if generic_type is not list:
-            return None
         args = t.get_args(cls)
+        if generic_type in responses.STREAMED_GENERICS:
+            # Streamed as arrays, AsyncGenerator[item, send] has two arguments
+            args = args[:1]
+        elif generic_type is not list:
+            return None
         if len(args) != 1:
             return None
         item_type = args[0]
@@ -231,13 +333,15 @@ class SchemaMaker:
         return schema
 
     def _make_schema_for_primitive(self, cls):
-        type_, format_ = self._PYTHON_TYPE_TO_SWAGGER.get(cls, (None, None))
-        if type_ is None:
+        parser_info = parsers.get_parser_info(cls)
+        if parser_info is None:
             logger.warning(
                 f"Class '{cls}' have no known schema and will be "
                 "described as plain string id OpenAPI Schema."
             )
             type_, format_ = "string", None
+        else:
+            type_, format_ = parser_info.schema_type, parser_info.schema_format
         schema = {"type": type_}
         if format_ is not None:
             schema["format"] = format_
@@ -245,20 +349,13 @@ class SchemaMaker:
 
     _REF_TEMPLATE = "#/components/schemas/{model}"
 
-    _PYTHON_TYPE_TO_SWAGGER = {
-        dict: ("object", None),
-        bytes: ("string", "binary"),
-        bytearray: ("string", "binary"),
-        str: ("string", None),
-        bool: ("boolean", None),
-        int: ("integer", None),
-        float: ("number", None),
-        datetime.date: ("string", "date"),
-        datetime.datetime: ("string", "date-time"),
-        uuid.UUID: ("string", "uuid"),
-    }
-
     OPENAPI_VERSION = "3.0.0"
 
 
+def _get_schema_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
 logger = logging.getLogger(__name__)
@@ -0,0 +1,101 @@
+"""
+Module generates specialized request parsers for handlers.
+
+Generic extraction calls every synchronous extractor one by one. Parser made by
+`make_sync_parser` is a function compiled from source built for particular
+extraction plan: it reads each path, query, header and cookie value, applies
+parser, handles defaults and builds dict of arguments in one straight-line pass,
+without per-parameter dispatch.
+"""
+
+import itertools
+import linecache
+import typing as t
+
+from aiohttp import web
+
+from aiohttp_openapi import exceptions
+
+from . import extractors
+
+_counter = itertools.count()
+
+# Extractor class -> (name of local variable, statement that defines it)
+_SOURCES = {
+    extractors._Path: ("match_info", "match_info = request.match_info"),
+    extractors._Query: ("query", "query = get_lowercase_query(request)"),
+    extractors._CaseSensitiveQuery: ("strict_query", "strict_query = request.query"),
+    extractors.Header: ("headers", "headers = request.headers"),
+    extractors.Cookie: ("cookies", "cookies = request.cookies"),
+}
+
+
+def make_sync_parser(
+    plan, name: str = "handler"
+) -> t.Callable[[web.Request], t.Dict[str, t.Any]]:
+    """
+    Return function that extracts values of all synchronous extractors of plan.
+
+    Extractors without known code template are called via `extract_sync`.
+    """
+    namespace = {
+        "Undefined": extractors.Undefined,
+        "MissingValueError": exceptions.MissingValueError,
+        "WrongValueError": exceptions.WrongValueError,
+    }
+    namespace["get_lowercase_query"] = extractors._get_lowercase_query
+    preamble, body, result = [], [], []
+    for i, (param_name, _) in enumerate(plan.sync_extractors):
+        extractor = plan.extractors[param_name]
+        source = _SOURCES.get(type(extractor))
+        if source is not None:
+            source_name, source_line = source
+            if source_line not in preamble:
+                preamble.append(source_line)
+            body.extend(_gen_lookup(i, extractor, namespace, source_name))
+        else:
+            namespace[f"extract_{i}"] = extractor.extract_sync
+            body.append(f"value_{i} = extract_{i}(request)")
+        result.append(f"{param_name!r}: value_{i}")
+
+    lines = ["def parse_request(request):"]
+    lines.extend("    " + line for line in preamble + body)
+    lines.append("    return {" + ", ".join(result) + "}")
+    source = "\n".join(lines) + "\n"
+
+    filename = f"<aiohttp_openapi parser {name} #{next(_counter)}>"
+    exec(compile(source, filename, "exec"), namespace)
+    # Keep source available for tracebacks and debuggers, as dataclasses do.
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    parse_request = namespace["parse_request"]
+    parse_request.__source__ = source
+    return parse_request
+
+
+def _gen_lookup(i, extractor, namespace, source_name) -> t.List[str]:
+    namespace[f"alias_{i}"] = extractor.alias
+    namespace[f"key_{i}"] = extractor._key
+    namespace[f"in_{i}"] = extractor._in_
+    namespace[f"parser_{i}"] = extractor._parse
+    method = "getall" if extractor._multiple else "get"
+    lines = [
+        f"raw = {source_name}.{method}(key_{i}, Undefined)",
+        "if raw is Undefined:",
+    ]
+    if extractor.required:
+        lines.append(f"    raise MissingValueError(alias_{i}, in_{i})")
+    else:
+        namespace[f"default_{i}"] = extractor.default
+        lines.append(f"    value_{i} = default_{i}")
+    lines.append("else:")
+    lines.extend("    " + line for line in _gen_parse(i))
+    return lines
+
+
+def _gen_parse(i) -> t.List[str]:
+    return [
+        "try:",
+        f"    value_{i} = parser_{i}(raw)",
+        "except ValueError as e:",
+        f"    raise WrongValueError(alias_{i}, in_{i}, e)",
+    ]
@@ -1,17 +1,18 @@
 """Module contains decorators to be used to enable functionality for handler."""
 
-import asyncio as aio
+import collections.abc
 import functools
 import inspect
 import re
 import typing as t
+import zlib
 from dataclasses import dataclass
 
 from aiohttp import hdrs, web
 
-from aiohttp_openapi import exceptions
+from aiohttp_openapi import cache, compression, exceptions, responses
 
-from . import enums, extractors, func_inspector
+from . import codegen, enums, extractors, func_inspector
 
 
 def openapi_view(openapi_handler=None, **meta):
@@ -40,10 +41,24 @@ class MetaInfo:
         tag=None,
         tags=tuple(),
         deprecated=None,
+        compile_parser=False,
+        case_sensitive_query=False,
+        stream_flush_bytes=None,
+        validate_responses=None,
+        etag=False,
+        max_age=None,
+        vary=tuple(),
+        compression=None,
+        cache=None,
+        coalesce=False,
     ):
         self.response_status = response_status
         self.response_description = response_description
-        self.content_type = enums.ContentType(content_type)
+        if isinstance(content_type, (str, enums.ContentType)):
+            content_type = (content_type,)
+        # Several content types mean that response format is negotiated
+        self.content_types = tuple(map(enums.ContentType, content_type))
+        self.content_type = self.content_types[0]
         if tags:
             if tag is not None:
                 raise exceptions.UnacceptableSignature(
@@ -55,6 +70,23 @@ class MetaInfo:
         else:
             self.tags = tuple()
         self.deprecated = deprecated
+        self.compile_parser = compile_parser
+        self.case_sensitive_query = case_sensitive_query
+        self.stream_flush_bytes = stream_flush_bytes
+        self.validate_responses = validate_responses
+        # True to hash encoded response or callable returning version of value
+        self.etag = etag
+        self.max_age = max_age
+        self.vary = tuple(vary)
+        # None means policy of application, False disables compression
+        self.compression = compression
+        self.cache = cache
+        # Identical concurrent GET requests share one call of handler
+        self.coalesce = coalesce
+
+
+# Methods answered with 304 when ETag of response matches If-None-Match
+_CONDITIONAL_METHODS = frozenset((hdrs.METH_GET, hdrs.METH_HEAD))
 
 
 class _AiohttpHandlerMaker:
@@ -63,6 +95,12 @@ class _AiohttpHandlerMaker:
 
     def __init__(self, **meta):
         self.meta = MetaInfo(**meta)
+        self.cache_headers = responses.make_cache_headers(
+            self.meta.max_age,
+            self.meta.vary,
+            negotiated=len(self.meta.content_types) > 1,
+        )
+        self.flights = cache.SingleFlight()
 
     def __call__(self, openapi_handler) -> t.Callable:
         if inspect.isclass(openapi_handler):
@@ -74,6 +112,42 @@ class _AiohttpHandlerMaker:
         """Make usual aiohttp handler (that accepts `request` or `self`)."""
         self.set_meta(openapi_handler)
         self.mark_openapi_handler(openapi_handler)
+        # Routes without path parameters are the most common case, so the plan
+        # for them is built right away. It also reveals wrong signatures early.
+        plan = self.get_extraction_plan(openapi_handler, ())
+        if plan.unmatched and (self.meta.cache is not None or self.meta.coalesce):
+            # Response may depend on anything in request, e.g. on user
+            raise exceptions.UnacceptableSignature(
+                f"Response of {openapi_handler.__qualname__} can not be cached or "
+                f"coalesced, handler receives request: {', '.join(plan.unmatched)}"
+            )
+        if self.meta.cache is not None:
+            self.meta.cache.check_handler(openapi_handler)
+        validator = responses.ResponseValidator.for_handler(
+            openapi_handler, plan.inspect_info.return_type
+        )
+
+        async def call_handler(request, args, kwargs):
+            # Streamed body (e.g. JsonStream) is validated while handler runs
+            result = openapi_handler(*args, **kwargs)
+            if inspect.isawaitable(result):  # not async generator function
+                result = await result
+            if isinstance(result, web.StreamResponse):
+                return result
+            if validator is not None and result is not None:
+                validator.maybe_validate(request, result, self.meta.validate_responses)
+            return result
+
+        async def call_shared(request, args, kwargs, key):
+            """Return result of handler, shared response and raised HTTPException."""
+            try:
+                result = await call_handler(request, args, kwargs)
+            except web.HTTPException as e:
+                # Exception is response, it can not be sent for several requests
+                return None, None, e
+            if isinstance(result, (web.StreamResponse, collections.abc.AsyncIterable)):
+                return result, None, None  # only caller that started flight uses it
+            return result, self.encode_shared(request, result, key), None
 
         @functools.wraps(openapi_handler)
         async def handler(*args):
@@ -83,19 +157,191 @@ class _AiohttpHandlerMaker:
             else:
                 request = args[0].request  # (self,)
 
-            errors = []
+            plan = self.get_extraction_plan(openapi_handler, request.match_info)
             try:
-                kwargs, unmatched = await _parse_arguments(request, openapi_handler)
+                kwargs = await _extract_arguments(request, plan)
+                args = args[: len(plan.unmatched)]
+                key = None
+                if self.meta.cache is not None or self.meta.coalesce:
+                    key = self.make_cache_key(request, openapi_handler, kwargs)
+                if key is not None and self.meta.cache is not None:
+                    cached = self.meta.cache.get(key)
+                    if cached:
+                        return await self.finish_response(
+                            request, cached.to_response(), cache_key=key
+                        )
+                if key is not None and self.meta.coalesce:
+                    call = functools.partial(call_shared, request, args, kwargs, key)
+                    (result, shared, error), started = await self.flights.run(key, call)
+                    if shared is not None:
+                        return await self.finish_response(
+                            request, shared.to_response(), cache_key=key
+                        )
+                    if not started:
+                        result = await call_handler(request, args, kwargs)
+                    elif error is not None:
+                        raise error
+                else:
+                    result = await call_handler(request, args, kwargs)
+                if isinstance(result, web.StreamResponse):
+                    return result
+                return await self.make_response(request, result, key)
             except exceptions.ValidationError as e:
-                errors.extend(e.errors())
-            if errors:
-                return web.json_response(data=errors, status=self._ERR_RESPONSE_STATUS)
-
-            result = await openapi_handler(*args[: len(unmatched)], **kwargs)
-            return result
+                return web.json_response(
+                    data=e.errors(), status=e.status or self._ERR_RESPONSE_STATUS
+                )
+            finally:
+                extractors._run_cleanups(request)
 
+        handler.response_validator = validator
         return handler
 
+    async def make_response(
+        self, request: web.Request, result, cache_key: cache.CacheKey = None
+    ) -> web.StreamResponse:
+        """
+        Return response with value returned by handler, encoded only once.
+
+        Async iterators are streamed, they may use uploaded files until the end.
+        Encoded response is cached if `cache_key` is given.
+        """
+        if result is None:
+            return web.Response(status=self.meta.response_status or 204)
+        status = self.meta.response_status or 200
+        policy = compression.get_request_policy(request, self.meta.compression)
+        headers = self.get_headers(policy)
+        if isinstance(result, collections.abc.AsyncIterable):
+            encoding = None
+            if policy is not None:
+                encoding = compression.negotiate_encoding(request, policy.encodings)
+            return await responses.stream_response(
+                request,
+                result,
+                status=status,
+                content_types=self.meta.content_types,
+                headers=headers,
+                flush_bytes=self.meta.stream_flush_bytes,
+                content_encoding=encoding,
+            )
+
+        etag = None
+        use_etag = self.meta.etag and request.method in _CONDITIONAL_METHODS
+        if use_etag and callable(self.meta.etag):
+            # Version is checked before value is encoded
+            etag = responses.make_version_etag(self.meta.etag(result))
+            if responses.is_not_modified(request, etag):
+                return responses.not_modified(etag, headers)
+        response = self.encode_response(request, result, policy, etag)
+        if cache_key is not None and self.meta.cache is not None:
+            self.meta.cache.set(cache_key, cache.CachedResponse.from_response(response))
+        return await self.finish_response(request, response, policy, cache_key)
+
+    def encode_response(
+        self, request: web.Request, result, policy, etag: str = None
+    ) -> web.Response:
+        """Return uncompressed response with value, with ETag if it is enabled."""
+        response = responses.make_response(
+            request,
+            result,
+            status=self.meta.response_status or 200,
+            content_types=self.meta.content_types,
+            headers=self.get_headers(policy),
+        )
+        if etag is None and self.meta.etag and request.method in _CONDITIONAL_METHODS:
+            if callable(self.meta.etag):
+                etag = responses.make_version_etag(self.meta.etag(result))
+            else:
+                etag = responses.make_body_etag(response.body, weak=policy is not None)
+        if etag is not None:
+            response.etag = etag
+        return response
+
+    def encode_shared(
+        self, request: web.Request, result, key: cache.CacheKey
+    ) -> cache.CachedResponse:
+        """Return response shared by coalesced requests, caching it if enabled."""
+        if result is None:
+            return cache.CachedResponse(self.meta.response_status or 204, b"", ())
+        policy = compression.get_request_policy(request, self.meta.compression)
+        shared = cache.CachedResponse.from_response(
+            self.encode_response(request, result, policy)
+        )
+        if self.meta.cache is not None:
+            self.meta.cache.set(key, shared)
+        return shared
+
+    async def finish_response(
+        self,
+        request: web.Request,
+        response: web.Response,
+        policy=None,
+        cache_key: cache.CacheKey = None,
+    ) -> web.Response:
+        """
+        Answer conditional request with 304, compress response otherwise.
+
+        Compressed body of cached response is cached too, see `compress_cached`.
+        """
+        if policy is None:
+            policy = compression.get_request_policy(request, self.meta.compression)
+        etag = response.etag
+        if etag is not None and responses.is_not_modified(request, etag):
+            return responses.not_modified(etag, self.get_headers(policy))
+        if policy is None:
+            return response
+        if cache_key is not None and self.meta.cache is not None:
+            await self.compress_cached(request, response, policy, cache_key)
+        else:
+            await compression.compress_response(request, response, policy)
+        return response
+
+    async def compress_cached(
+        self, request: web.Request, response: web.Response, policy, key
+    ):
+        """
+        Compress response like `compress_response`, using cache for its body.
+
+        Compressed body is cached for the same handler and arguments, so it is
+        invalidated with the response. Its variant has checksum of uncompressed
+        body, compressed body of previous version of response never matches.
+        """
+        compression.add_vary(response.headers)
+        encoding = compression.get_response_encoding(request, response, policy)
+        if encoding is None:
+            return
+        variant = (key.variant, encoding, zlib.crc32(response.body))
+        key = key._replace(variant=variant)
+        cached = self.meta.cache.get(key)
+        if cached is not None:
+            response.body = cached.body
+        else:
+            response.body = await compression.compress_body(
+                response.body, encoding, policy
+            )
+            self.meta.cache.set(
+                key, cache.CachedResponse(response.status, response.body, ())
+            )
+        response.headers[hdrs.CONTENT_ENCODING] = encoding
+
+    def get_headers(self, policy) -> t.Mapping[str, str]:
+        """Return headers of all responses, including 304 ones."""
+        if policy is None:
+            return self.cache_headers
+        headers = dict(self.cache_headers)
+        compression.add_vary(headers)
+        return headers
+
+    def make_cache_key(
+        self, request: web.Request, openapi_handler, arguments
+    ) -> t.Optional[cache.CacheKey]:
+        """Return key of response in cache, None if it can not be cached."""
+        if request.method not in _CONDITIONAL_METHODS:
+            return None
+        variant = None
+        if len(self.meta.content_types) > 1:
+            variant = responses.negotiate_content_type(request, self.meta.content_types)
+        return cache.make_key(openapi_handler, arguments, variant)
+
     def make_class_view(self, cls: web.View) -> web.View:
         for method in hdrs.METH_ALL:
             if method_handler := getattr(cls, method.lower(), None):
@@ -119,6 +365,28 @@ class _AiohttpHandlerMaker:
     @staticmethod
     def mark_openapi_handler(openapi_handler):
         openapi_handler._is_openapi_handler = True
+        openapi_handler._extraction_plans = {}
+
+    @staticmethod
+    def get_extraction_plan(
+        openapi_handler, path_param_names: t.Iterable[str]
+    ) -> func_inspector.ExtractionPlan:
+        """Return extraction plan for handler, building it on the first call."""
+        key = frozenset(path_param_names)
+        plans = openapi_handler._extraction_plans
+        plan = plans.get(key)
+        if plan is None:
+            meta = _AiohttpHandlerMaker.get_meta(openapi_handler)
+            plan = func_inspector.make_extraction_plan(
+                openapi_handler, key, meta.case_sensitive_query
+            )
+            if meta.compile_parser:
+                sync_parser = codegen.make_sync_parser(
+                    plan, openapi_handler.__qualname__
+                )
+                plan = plan._replace(sync_parser=sync_parser)
+            plans[key] = plan
+        return plan
 
     @staticmethod
     def get_openapi_handler(handler):
@@ -127,30 +395,22 @@ class _AiohttpHandlerMaker:
                 return wrapped
 
 
-async def _parse_arguments(
-    request, openapi_handler
-) -> t.Tuple[t.Dict[str, t.Any], t.List[str]]:
+async def _extract_arguments(
+    request: web.Request, plan: func_inspector.ExtractionPlan
+) -> t.Dict[str, t.Any]:
     """
     Return map of openapi_handler parameters to its values.
 
-    Values extracted from request.
+    Synchronous extractors are called inline, only body (at most one per handler)
+    is awaited.
     """
-    path_param_names = set(request.match_info.keys())
-    extractors, unmatched, _ = func_inspector.make_extractors_for_handler(
-        openapi_handler, path_param_names
-    )
-    arguments = await _extract_arguments(request, extractors)
-    return arguments, unmatched
-
-
-async def _extract_arguments(
-    request: web.Request, extractors: t.Dict[str, extractors.Extractor]
-) -> t.Dict[str, t.Any]:
-    param_names = list(extractors.keys())
-    values = await aio.gather(
-        *(extractors[param_name].extract(request) for param_name in param_names)
-    )
-    return dict(zip(param_names, values))
+    if plan.sync_parser is not None:
+        arguments = plan.sync_parser(request)
+    else:
+        arguments = {name: extract(request) for name, extract in plan.sync_extractors}
+    for name, extractor in plan.async_extractors:
+        arguments[name] = await extractor.extract(request)
+    return arguments
 
 
 class RouteInfo(t.NamedTuple):
@@ -160,7 +420,7 @@ class RouteInfo(t.NamedTuple):
     Combination of analyzing resource path and aiohttp handler.
     """
 
-    extractors: t.Dict[str, extractors.Extractor]
+    extractors: t.Mapping[str, extractors.Extractor]
     inspect_info: func_inspector.InspectInfo
     meta: MetaInfo
 
@@ -171,14 +431,14 @@ def gen_routes_info(route):
     """
     for method, openapi_handler in _gen_openapi_handlers(route):
         path_param_names = _get_path_param_names_for_resource(route.resource)
-        extractors_info = func_inspector.make_extractors_for_handler(
+        plan = _AiohttpHandlerMaker.get_extraction_plan(
             openapi_handler, path_param_names
         )
-        route_extractors, _, inspect_info = extractors_info
+        route_extractors, inspect_info = plan.extractors, plan.inspect_info
         param_extractors = set(
             extractor.alias
             for extractor in route_extractors.values()
-            if isinstance(extractor, extractors.Param)
+            if isinstance(extractor, extractors._Path)
         )
         for path_param_name in path_param_names:
             if path_param_name not in param_extractors:
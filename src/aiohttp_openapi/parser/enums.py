@@ -9,6 +9,7 @@ class Locations(Enum):
     header = "header"
     cookie = "cookie"
     json = "body (json)"
+    msgpack = "body (msgpack)"
     multipart = "body (multipart)"
     text = "body (text)"
     binary = "body (binary)"
@@ -16,4 +17,6 @@ class Locations(Enum):
 
 class ContentType(Enum):
     application_json = "application/json"
+    application_msgpack = "application/msgpack"
+    application_x_ndjson = "application/x-ndjson"
     application_zip = "application/zip"
@@ -1,15 +1,24 @@
 """Module contains Extractors - classes that can extract value from request."""
 
 import abc
+import array
+import asyncio
+import functools
 import json
+import re
+import tempfile
+import typing as t
+import zlib
 from collections import namedtuple
 
 import aiohttp
 import pydantic
-from aiohttp import web
+from aiohttp import hdrs, web
+from multidict import MultiDict, istr
 
-from aiohttp_openapi import exceptions
+from aiohttp_openapi import codecs, exceptions, settings, sinks
 
+from . import parsers
 from .enums import Locations
 
 
@@ -30,9 +39,14 @@ class Extractor(abc.ABC):
         parser (type): callable that turn string into value (e.g. int).
         default (object): Value if field not in request. If parser is not given
             explicitly, parser is set to type(default).
+
+    Extractors that never wait for data (e.g. path and query parameters) set
+    `_sync_` to True and implement `extract_sync`, so handler wrapper may call
+    them directly instead of scheduling coroutines.
     """
 
     _in_ = None
+    _sync_ = False
 
     Undefined = Undefined
 
@@ -118,6 +132,9 @@ class Extractor(abc.ABC):
     async def extract(self, request: web.Request):
         raise NotImplementedError
 
+    def extract_sync(self, request: web.Request):
+        raise NotImplementedError
+
     @staticmethod
     def is_request_cls(request):
         return issubclass(request, web.Request)
@@ -125,86 +142,487 @@ class Extractor(abc.ABC):
 
 class Param(Extractor):
     """
-    Path or Query parameter.
+    Path, query, header or cookie parameter.
+
+    Subclasses define where the raw value is looked up by `_get_raw_value`
+    using `_key` - precomputed form of alias suitable for that location.
+
+    If `cache` is given, up to `cache` parsed values are memoized with LRU
+    eviction, e.g. `Param(uuid.UUID, cache=4096)`. It is allowed only for
+    parsers declared pure (see `parsers.register_parser`), statistics are
+    available via `cache_info`.
+
+    Parser `typing.List[item_type]` (or `list[item_type]`) declares array.
+    Serialization of array is defined by `style` and `explode` like in OpenAPI:
+    with `explode=True` (default for query) all values of repeated parameter are
+    taken (`?id=1&id=2`), otherwise single value is split (`?id=1,2`). All items
+    are parsed in one batch, `as_array=True` returns compact `array.array` for
+    `int` and `float` items.
     """
 
-    async def extract(self, request: web.Request):
-        raise NotImplementedError
-
+    _sync_ = True
+    _style_ = "form"
+    _multiple_values_ = False
+
+    def __init__(
+        self,
+        parser_or_default=Undefined,
+        default=Undefined,
+        *,
+        cache=None,
+        as_array=False,
+        **extra,
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        self._key = self._make_key() if self.alias else None
+        self.item_type = _get_array_item_type(self.parser)
+        self.style = self.extra.get("style", self._style_)
+        self.explode = self.extra.get("explode", self.style == "form")
+        self.as_array = as_array
+        self._multiple = (
+            self.item_type is not None and self.explode and self._multiple_values_
+        )
+        if cache is not None and (
+            not isinstance(cache, int) or isinstance(cache, bool)
+        ):
+            raise exceptions.UnacceptableSignature(
+                f"Cache should be maximal amount of parsed values, got {cache!r}"
+            )
+        self._cache = cache
+        if cache is not None:
+            if not parsers.is_pure(self.parser):
+                raise exceptions.UnacceptableSignature(
+                    f"Cache is allowed only for pure parsers, got {self.parser}. "
+                    "Use `register_parser(..., pure=True)` to declare parser pure."
+                )
+        if self.item_type is not None:
+            self._parse = _make_array_parser(
+                self.item_type, _STYLE_DELIMITERS.get(self.style, ","), as_array
+            )
+        elif cache is None:
+            self._parse = parsers.get_parser(self.parser)
+        else:
+            self._parse = functools.lru_cache(maxsize=cache)(
+                parsers.get_parser(self.parser)
+            )
 
-class _Query(Param):
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        if self._cache is not None:
+            kwargs["cache"] = self._cache
+        if self.as_array:
+            kwargs["as_array"] = self.as_array
+        return kwargs
 
-    _in_ = Locations.query
+    def cache_info(self):
+        """Return hits and misses of parsed values cache, None if it is disabled."""
+        if self._cache is None:
+            return None
+        return self._parse.cache_info()
 
     async def extract(self, request: web.Request):
-        raw_value = self.Undefined
-        for key in request.query.keys():
-            if key.lower() == self.alias.lower():
-                raw_value = request.query.get(key, self.Undefined)
-                break
+        return self.extract_sync(request)
+
+    def extract_sync(self, request: web.Request):
+        raw_value = self._get_raw_value(request)
         if raw_value is self.Undefined:
             if not self.required:
                 return self.default
             else:
                 raise exceptions.MissingValueError(self.alias, self._in_)
         try:
-            value = self.parser(raw_value)
+            value = self._parse(raw_value)
         except ValueError as e:
             raise exceptions.WrongValueError(self.alias, self._in_, e)
         return value
 
+    @Extractor.python_name.setter
+    def python_name(self, value):
+        self._python_name = value
+        self._key = self._make_key()
+
+    def _make_key(self):
+        return self.alias
+
+    def _get_raw_value(self, request: web.Request):
+        raise NotImplementedError
+
+
+class _Query(Param):
+    """
+    Query parameter, name of the parameter is case-insensitive.
+
+    All query extractors of a request share one index of query string with
+    lowercase keys, see `_get_lowercase_query`.
+    """
+
+    _in_ = Locations.query
+    _multiple_values_ = True
+
+    def _make_key(self):
+        return self.alias.lower()
+
+    def _get_raw_value(self, request: web.Request):
+        query = _get_lowercase_query(request)
+        if self._multiple:
+            return query.getall(self._key, self.Undefined)
+        return query.get(self._key, self.Undefined)
+
+
+class _CaseSensitiveQuery(_Query):
+    """Query parameter that is looked up in `request.query` as is."""
+
+    def _make_key(self):
+        return self.alias
+
+    def _get_raw_value(self, request: web.Request):
+        if self._multiple:
+            return request.query.getall(self._key, self.Undefined)
+        return request.query.get(self._key, self.Undefined)
+
 
 class _Path(Param):
     _in_ = Locations.path
+    _style_ = "simple"
 
-    async def extract(self, request: web.Request):
-        raw_value = request.match_info[self.alias]
-        try:
-            value = self.parser(raw_value)
-        except ValueError as e:
-            raise exceptions.WrongValueError(self.alias, self._in_, e)
-        return value
+    def _get_raw_value(self, request: web.Request):
+        return request.match_info[self._key]
 
 
 class Header(Param):
+    """
+    Header value, name of the header is case-insensitive.
+
+    Key is stored as `multidict.istr`, so `request.headers` does not fold case of
+    the name on every lookup.
+    """
+
     _in_ = Locations.header
+    _style_ = "simple"
+
+    def _make_key(self):
+        return istr(self.alias)
+
+    def _get_raw_value(self, request: web.Request):
+        return request.headers.get(self._key, self.Undefined)
 
 
 class Cookie(Param):
+    """
+    Cookie value.
+
+    Cookie header is parsed once per request by aiohttp (`request.cookies` is
+    cached), so all cookie extractors of a handler share the result.
+    """
+
     _in_ = Locations.cookie
 
+    def _get_raw_value(self, request: web.Request):
+        return request.cookies.get(self._key, self.Undefined)
+
 
 class Body(Extractor):
+    """
+    Base class for extractors of request body.
+
+    Body is not read if it is larger than `max_bytes` (or `max_body_bytes` from
+    application settings): `Content-Length` is checked before reading and size
+    is checked while reading, PayloadTooLargeError (413) is raised. Extractors
+    of parts of `MultiPart` are limited by `max_part_bytes` from settings.
+
+    If `decompress` is set in application settings, extractors with
+    `_decompress_` decompress gzip and deflate bodies as they arrive, then
+    `max_bytes` limits size of decompressed body, bodies read at once are
+    limited by `max_decompressed_bytes` from settings by default.
+    """
+
     _content_ = None
+    _decompress_ = False
+    max_bytes = None
+
+    def __init__(
+        self, parser_or_default=Undefined, default=Undefined, *, max_bytes=None, **extra
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        self.max_bytes = max_bytes
+
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        if self.max_bytes is not None:
+            kwargs["max_bytes"] = self.max_bytes
+        return kwargs
 
     @property
     def is_multipart(self):
         return isinstance(self, MultiPartReader)
 
+    @property
+    def content_types(self) -> t.Tuple[str, ...]:
+        """Media types of body accepted by extractor."""
+        return (self._content_,)
+
+    def _get_max_bytes(self, request):
+        if self.max_bytes is not None:
+            return self.max_bytes
+        if isinstance(request, aiohttp.BodyPartReader):
+            return settings.get_settings(request).max_part_bytes
+        return settings.get_settings(request).max_body_bytes
+
+    async def _read(self, request) -> bytes:
+        return await _read_body(request, self._get_max_bytes(request), self._in_)
+
 
 class Json(Body):
+    """
+    JSON body.
+
+    Body is decoded from bytes by `loads` - callable or name of library
+    ("stdlib", "orjson", "ujson"). By default decoder from application
+    settings is used, see `aiohttp_openapi.configure`.
+
+    With `from_raw=True` pydantic model validates raw body itself:
+    `model_validate_json` is used on pydantic v2, which does not build
+    intermediate Python objects, so `loads` can not be given with it. On
+    pydantic v1 body is parsed as by `parse_raw`, with configured `loads`.
+
+    `max_depth` and `max_items` limit nesting of JSON document and amount of
+    items in each array or object, they are checked before decoding.
+    """
+
     _content_ = "application/json"
     _in_ = Locations.json
+    _decompress_ = True
+
+    def __init__(
+        self,
+        parser_or_default=Undefined,
+        default=Undefined,
+        *,
+        loads=None,
+        from_raw=False,
+        max_depth=None,
+        max_items=None,
+        **extra,
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.loads = loads
+        self._loads = codecs.get_json_loads(loads) if loads is not None else None
+        self.from_raw = from_raw
+        self._validate_raw = _make_raw_validator(self.parser) if from_raw else None
+        if from_raw and loads is not None and _IS_PYDANTIC_V2:
+            raise exceptions.UnacceptableSignature(
+                "Body is decoded by pydantic with from_raw=True, `loads` is not used"
+            )
+
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        if self.loads is not None:
+            kwargs["loads"] = self.loads
+        if self.from_raw:
+            kwargs["from_raw"] = self.from_raw
+        if self.max_depth is not None:
+            kwargs["max_depth"] = self.max_depth
+        if self.max_items is not None:
+            kwargs["max_items"] = self.max_items
+        return kwargs
 
     async def extract(self, request: web.Request):
+        body = await self._read(request)
+        app_settings = settings.get_settings(request)
+        max_depth = self.max_depth or app_settings.max_json_depth
+        max_items = self.max_items or app_settings.max_json_items
+        if max_depth or max_items:
+            _check_json_limits(body, max_depth, max_items, self._in_)
+
+        loads = self._loads or app_settings.json_loads
+        if self._validate_raw is not None:
+            try:
+                return self._validate_raw(body, loads)
+            except (ValueError, pydantic.ValidationError) as e:
+                raise exceptions.WrongValueError("__root__", self._in_, e)
+
         try:
-            request_data = await request.json()
+            request_data = loads(body)
             if issubclass(self.parser, pydantic.BaseModel):
                 value = self.parser.parse_obj(request_data)
             else:
                 value = self.parser(request_data)
-        except (
-            json.JSONDecodeError,
-            UnicodeDecodeError,
-            pydantic.ValidationError,
-        ) as e:
+        except (ValueError, pydantic.ValidationError) as e:
+            # JSONDecodeError and UnicodeDecodeError of any decoder are ValueErrors
             raise exceptions.WrongValueError("__root__", self._in_, e)
         return value
 
 
+class MsgPack(Body):
+    """
+    MessagePack body, decoded value is parsed like in `Json`.
+
+    Requires `msgpack` package.
+    """
+
+    _content_ = "application/msgpack"
+    _in_ = Locations.msgpack
+    _decompress_ = True
+
+    async def extract(self, request: web.Request):
+        body = await self._read(request)
+        try:
+            request_data = codecs.msgpack_loads(body)
+            if issubclass(self.parser, pydantic.BaseModel):
+                value = self.parser.parse_obj(request_data)
+            else:
+                value = self.parser(request_data)
+        except (ValueError, pydantic.ValidationError) as e:
+            # All errors of malformed MessagePack document are ValueErrors
+            raise exceptions.WrongValueError("__root__", self._in_, e)
+        return value
+
+
+class Negotiated(Body):
+    """
+    Body in JSON or MessagePack, format is chosen by `Content-Type` of request.
+
+    Value is extracted by `Json` or `MsgPack` made with the same arguments,
+    UnsupportedMediaTypeError (415) is raised for other content types.
+    See also `aiohttp_openapi.make_response` to answer in the same format.
+    """
+
+    _content_ = "application/json"
+    _in_ = Locations.json
+    _decompress_ = True
+
+    def __init__(self, parser_or_default=Undefined, default=Undefined, **extra):
+        super().__init__(parser_or_default, default, **extra)
+        json_extractor = Json(*self.init_args, **self.init_kwargs)
+        msgpack_extractor = MsgPack(*self.init_args, **self.init_kwargs)
+        self._extractors = {
+            content_type: json_extractor for content_type in JSON_CONTENT_TYPES
+        }
+        self._extractors.update(
+            (content_type, msgpack_extractor) for content_type in MSGPACK_CONTENT_TYPES
+        )
+
+    @property
+    def content_types(self) -> t.Tuple[str, ...]:
+        return (Json._content_, MsgPack._content_)
+
+    async def extract(self, request: web.Request):
+        extractor = self._extractors.get(request.content_type)
+        if extractor is None:
+            raise exceptions.UnsupportedMediaTypeError(
+                "__root__", self._in_, request.content_type, self.content_types
+            )
+        return await extractor.extract(request)
+
+
+JSON_CONTENT_TYPES = ("application/json",)
+MSGPACK_CONTENT_TYPES = (
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/vnd.msgpack",
+)
+NDJSON_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+)
+
+
+class JsonStream(Body):
+    """
+    Stream of JSON items, handler gets async iterator of parsed items.
+
+    Body is either newline delimited JSON (`application/x-ndjson`) or JSON
+    array. Items are decoded and parsed as body arrives, so memory used depends
+    on size of an item, not size of the body. With `batch_size` iterator yields
+    lists of up to `batch_size` items.
+
+    Invalid item raises ItemValidationError while handler iterates over items,
+    the error is turned to the usual response with `loc` starting with index of
+    the item. `loads` and `max_depth` are the same as for `Json`, `max_depth`
+    is applied to each item.
+    """
+
+    _content_ = "application/x-ndjson"
+    _in_ = Locations.json
+    _decompress_ = True
+
+    def __init__(
+        self,
+        parser_or_default=Undefined,
+        default=Undefined,
+        *,
+        batch_size=None,
+        loads=None,
+        max_depth=None,
+        **extra,
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        if batch_size is not None and batch_size < 1:
+            raise exceptions.UnacceptableSignature(
+                f"batch_size should be positive, got {batch_size}"
+            )
+        self.batch_size = batch_size
+        self.max_depth = max_depth
+        self.loads = loads
+        self._loads = codecs.get_json_loads(loads) if loads is not None else None
+        if _is_pydantic_model(self.parser):
+            self._parse_item = self.parser.parse_obj
+        else:
+            self._parse_item = self.parser
+
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        if self.batch_size is not None:
+            kwargs["batch_size"] = self.batch_size
+        if self.loads is not None:
+            kwargs["loads"] = self.loads
+        if self.max_depth is not None:
+            kwargs["max_depth"] = self.max_depth
+        return kwargs
+
+    @property
+    def content_types(self) -> t.Tuple[str, ...]:
+        return (self._content_, "application/json")
+
+    async def extract(self, request: web.Request) -> t.AsyncIterator:
+        _check_content_length(request, self._get_max_bytes(request), self._in_)
+        items = self._iter_items(request)
+        if self.batch_size is not None:
+            return _iter_batches(items, self.batch_size)
+        return items
+
+    async def _iter_items(self, request: web.Request):
+        app_settings = settings.get_settings(request)
+        loads = self._loads or app_settings.json_loads
+        max_depth = self.max_depth or app_settings.max_json_depth
+        chunks = _iter_chunks(request, self._get_max_bytes(request), self._in_)
+        if request.content_type in NDJSON_CONTENT_TYPES:
+            raw_items = _split_ndjson(chunks)
+        else:
+            raw_items = _split_json_array(chunks, self._in_)
+        index = 0
+        async for raw_item in raw_items:
+            if max_depth:
+                _check_json_limits(raw_item, max_depth, None, self._in_, index)
+            try:
+                item = self._parse_item(loads(raw_item))
+            except (ValueError, pydantic.ValidationError) as e:
+                raise exceptions.ItemValidationError(index, self._in_, e)
+            yield item
+            index += 1
+
+
 class Text(Body):
     _content_ = "text/plain"
     _in_ = Locations.text
+    _decompress_ = True
 
     def __init__(self, parser_or_default=Undefined, default=Undefined, **extra):
         if parser_or_default == default == Undefined:
@@ -212,8 +630,9 @@ class Text(Body):
         super().__init__(parser_or_default, default, **extra)
 
     async def extract(self, request: web.Request):
+        body = await self._read(request)
         try:
-            request_data = await request.text()
+            request_data = body.decode(_get_charset(request))
             value = self.parser(request_data)
         except UnicodeDecodeError as e:
             raise exceptions.WrongValueError("__root__", self._in_, e)
@@ -223,6 +642,7 @@ class Text(Body):
 class FileUpload(Body):
     _content_ = "application/octet-stream"
     _in_ = Locations.binary
+    _decompress_ = True
 
     def __init__(self, parser_or_default=Undefined, default=Undefined, **extra):
         if parser_or_default == default == Undefined:
@@ -230,8 +650,8 @@ class FileUpload(Body):
         super().__init__(parser_or_default, default, **extra)
 
     async def extract(self, request: web.Request):
+        request_data = await self._read(request)
         try:
-            request_data = await request.read()
             value = self.parser(request_data)
         except UnicodeDecodeError as e:
             raise exceptions.WrongValueError("__root__", self._in_, e)
@@ -239,29 +659,139 @@ class FileUpload(Body):
 
 
 class FileUploadReader(FileUpload):
+    """
+    Binary body, handler gets stream of body as is, it is never decompressed.
+
+    If body is limited, stream raises PayloadTooLargeError when more than
+    `max_bytes` is read from it.
+    """
+
+    _decompress_ = False
+
     async def extract(self, request: web.Request) -> aiohttp.streams.StreamReader:
-        return request.content
+        max_bytes = self._get_max_bytes(request)
+        _check_content_length(request, max_bytes, self._in_)
+        if max_bytes is None:
+            return request.content
+        return _LimitedStream(request.content, max_bytes, self._in_)
+
+
+class FileUploadTee(FileUpload):
+    """
+    Binary body or part of multipart body fed to several sinks at once.
+
+    Body is read once, each chunk is passed to all `sinks` concurrently
+    (see `aiohttp_openapi.sinks`), reading waits for the slowest sink. Handler
+    gets namedtuple with results of sinks by their names, e.g.
+    `FileUploadTee(sinks=[DiskSink(), HashSink(), SizeSink()])` gives
+    `(path, sha256, size)`.
+    """
+
+    def __init__(
+        self,
+        parser_or_default=Undefined,
+        default=Undefined,
+        *,
+        sinks: t.Sequence[sinks.Sink],
+        **extra,
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        if not sinks:
+            raise exceptions.UnacceptableSignature("At least one sink is required")
+        self.sinks = tuple(sinks)
+        try:
+            self._results_type = namedtuple(
+                "TeeResults", [sink.name for sink in self.sinks]
+            )
+        except ValueError as e:  # names are not unique or not identifiers
+            raise exceptions.UnacceptableSignature(f"Wrong names of sinks: {e}")
+
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        kwargs["sinks"] = self.sinks
+        return kwargs
+
+    async def extract(self, request: web.Request):
+        max_bytes = self._get_max_bytes(request)
+        if isinstance(request, aiohttp.BodyPartReader):
+            name = _get_part_name(request, self._in_)
+            chunks = _iter_part_chunks(request, max_bytes, self._in_, name)
+        else:
+            _check_content_length(request, max_bytes, self._in_)
+            chunks = _iter_chunks(request, max_bytes, self._in_)
+        results = await sinks.tee(chunks, self.sinks)
+        return self._results_type._make(results)
 
 
 class MultipleFileUpload(Body):
+    """
+    Multipart form, all parts are read and passed to parser as dict.
+
+    Besides `max_bytes` for whole body, size of each part can be limited by
+    `max_part_bytes` (or `max_part_bytes` from application settings).
+
+    If `spool_threshold` (or `spool_threshold` from application settings) is
+    set, binary parts are streamed to `SpooledFile` objects instead of bytes,
+    files are kept in memory until they are larger than `spool_threshold`.
+    Files are closed and removed when handler returns. Text and JSON parts are
+    always read to memory.
+    """
+
     _content_ = "multipart/form-data"
     _in_ = Locations.multipart
 
+    def __init__(
+        self,
+        parser_or_default=Undefined,
+        default=Undefined,
+        *,
+        max_part_bytes=None,
+        spool_threshold=None,
+        **extra,
+    ):
+        super().__init__(parser_or_default, default, **extra)
+        self.max_part_bytes = max_part_bytes
+        self.spool_threshold = spool_threshold
+
+    @property
+    def init_kwargs(self) -> dict:
+        kwargs = super().init_kwargs
+        if self.max_part_bytes is not None:
+            kwargs["max_part_bytes"] = self.max_part_bytes
+        if self.spool_threshold is not None:
+            kwargs["spool_threshold"] = self.spool_threshold
+        return kwargs
+
     async def extract(self, request):
+        app_settings = settings.get_settings(request)
+        max_bytes = self._get_max_bytes(request)
+        max_part_bytes = self.max_part_bytes or app_settings.max_part_bytes
+        spool_threshold = self.spool_threshold
+        if spool_threshold is None:
+            spool_threshold = app_settings.spool_threshold
+        _check_content_length(request, max_bytes, self._in_)
+        _check_not_encoded(request, self._in_)
         request_data = {}
+        total_size = 0
         async for part in await request.multipart():
-            _raise_if_not_part_name(part, self._in_)
-            part_python_type = _guess_python_type(part.headers.get("Content-Type"))
+            name = _get_part_name(part, self._in_)
+            # Part is read not further than the rest of `max_bytes`
+            part_max_bytes = max_part_bytes
+            if max_bytes is not None and (
+                part_max_bytes is None or max_bytes - total_size < part_max_bytes
+            ):
+                part_max_bytes = max_bytes - total_size
             try:
-                if part_python_type is str:
-                    part_value = await part.text()
-                elif part_python_type is bytes:
-                    part_value = await part.read()
-                elif part_python_type is dict:
-                    part_value = await part.json()
-            except ValueError as e:
-                raise exceptions.WrongValueError(part.name, self._in_, e)
-            request_data[part.name] = part_value
+                part_value, size = await self._read_part(
+                    request, part, name, part_max_bytes, spool_threshold
+                )
+            except exceptions.PayloadTooLargeError:
+                if part_max_bytes == max_part_bytes:
+                    raise
+                raise _payload_too_large("__root__", self._in_, max_bytes)
+            total_size += size
+            request_data[name] = part_value
 
         try:
             if issubclass(self.parser, pydantic.BaseModel):
@@ -272,15 +802,140 @@ class MultipleFileUpload(Body):
             raise exceptions.WrongValueError("__root__", self._in_, e)
         return value
 
+    async def _read_part(
+        self, request, part, name: str, max_bytes, spool_threshold
+    ) -> t.Tuple[t.Any, int]:
+        """Return value of part and its size."""
+        part_python_type = _guess_python_type(part.headers.get("Content-Type"))
+        if part_python_type is bytes and spool_threshold is not None:
+            file = await _spool_part(
+                request, part, name, spool_threshold, max_bytes, self._in_
+            )
+            return file, file.size
+        data = await _read_body(part, max_bytes, self._in_, name)
+        try:
+            if part_python_type is str:
+                part_value = data.decode(_get_charset(part))
+            elif part_python_type is bytes:
+                part_value = data
+            elif part_python_type is dict:
+                part_value = json.loads(data.decode(_get_charset(part)))
+        except ValueError as e:
+            raise exceptions.WrongValueError(name, self._in_, e)
+        return part_value, len(data)
+
+
+class SpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    Binary part of multipart form spooled by `MultipleFileUpload`.
+
+    Besides file methods, it has `filename` and `content_type` of the part and
+    `size` of content. Can be used as type of field of pydantic model, field is
+    described as binary string in schema.
+    """
+
+    def __init__(self, max_size: int, filename=None, content_type=None):
+        super().__init__(max_size=max_size)
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls._validate
+
+    @classmethod
+    def _validate(cls, value):
+        if not isinstance(value, cls):
+            raise TypeError(f"{cls.__name__} expected, got {type(value).__name__}")
+        return value
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="string", format="binary")
+
+
+class _LimitedStream:
+    """
+    Stream of body given by `FileUploadReader`, counts bytes read from it.
+
+    PayloadTooLargeError is raised when more than `max_bytes` is read, other
+    attributes are of wrapped `StreamReader`.
+    """
+
+    def __init__(self, stream: aiohttp.StreamReader, max_bytes: int, location):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._location = location
+        self._size = 0
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __aiter__(self):
+        return self._iter(self.readline)
+
+    def _count(self, data: bytes) -> bytes:
+        self._size += len(data)
+        if self._size > self._max_bytes:
+            raise _payload_too_large("__root__", self._location, self._max_bytes)
+        return data
+
+    async def read(self, n: int = -1) -> bytes:
+        return self._count(await self._stream.read(n))
+
+    async def readany(self) -> bytes:
+        return self._count(await self._stream.readany())
+
+    async def readexactly(self, n: int) -> bytes:
+        return self._count(await self._stream.readexactly(n))
+
+    async def readline(self) -> bytes:
+        return self._count(await self._stream.readline())
+
+    async def readuntil(self, separator: bytes = b"\n") -> bytes:
+        return self._count(await self._stream.readuntil(separator))
+
+    async def readchunk(self) -> t.Tuple[bytes, bool]:
+        data, end_of_http_chunk = await self._stream.readchunk()
+        return self._count(data), end_of_http_chunk
+
+    def read_nowait(self, n: int = -1) -> bytes:
+        return self._count(self._stream.read_nowait(n))
+
+    def iter_chunked(self, n: int) -> t.AsyncIterator[bytes]:
+        return self._iter(lambda: self.read(n))
+
+    def iter_any(self) -> t.AsyncIterator[bytes]:
+        return self._iter(self.readany)
+
+    async def iter_chunks(self) -> t.AsyncIterator[t.Tuple[bytes, bool]]:
+        while (chunk := await self.readchunk()) != (b"", False):
+            yield chunk
+
+    @staticmethod
+    async def _iter(read: t.Callable[[], t.Awaitable[bytes]]):
+        while data := await read():
+            yield data
+
 
 class MultiPartReader(Body):
+    """
+    Multipart body, handler gets async iterator of parts with their extractors.
+
+    Whole body is limited by `max_bytes` (or `max_body_bytes` from application
+    settings), size received so far is checked before each part. Extractors of
+    parts use settings of application of request.
+    """
+
     _content_ = "multipart/mixed"
     _in_ = Locations.multipart
 
-    def __init__(self, *_, **parts_extractors):
+    def __init__(self, *_, max_bytes=None, **parts_extractors):
         self.extractors = parts_extractors
         self.required = True
         self.parser = bytes
+        self.max_bytes = max_bytes
         self._alias_to_extractor = {}
         for python_name, extractor in self.extractors.items():
             extractor.python_name = python_name
@@ -290,24 +945,63 @@ class MultiPartReader(Body):
         return self._reader(request)
 
     async def _reader(self, request):
-        async for part in await request.multipart():
-            _raise_if_not_part_name(part, self._in_)
-            part_extractor = self._alias_to_extractor.get(part.name)
+        async for part in self._iter_parts(request):
+            part_extractor = self._alias_to_extractor.get(
+                _get_part_name(part, self._in_)
+            )
             yield part, part_extractor
 
+    async def _iter_parts(self, request):
+        max_bytes = self._get_max_bytes(request)
+        _check_content_length(request, max_bytes, self._in_)
+        _check_not_encoded(request, self._in_)
+        async for part in await request.multipart():
+            _check_received_size(request, max_bytes, self._in_)
+            settings.set_part_settings(part, request)
+            yield part
+        _check_received_size(request, max_bytes, self._in_)
+
 
 class MultiPart(MultiPartReader):
-    async def extract(self, request: web.Request):
-        values = {}
-        reader = await super().extract(request)
-        async for part, part_extractor in reader:
-            values[part_extractor.python_name] = await part_extractor.extract(part)
-        MultipartValues = namedtuple("MultipartValues", list(self.extractors.keys()))
-        return MultipartValues(**values)
+    """
+    Multipart body, each part is extracted by its own extractor.
+
+    Handler gets namedtuple with a field for each part extractor. Absent parts
+    get default values of their extractors, MissingValueError is raised if
+    required part is absent. Parts without extractor are skipped.
+    """
 
+    def __init__(self, *_, max_bytes=None, **parts_extractors):
+        super().__init__(*_, max_bytes=max_bytes, **parts_extractors)
+        # Result type and its default values are made once, requests only fill
+        # a copy of defaults.
+        self._values_type = namedtuple("MultipartValues", self.extractors)
+        self._defaults = tuple(
+            Undefined if extractor.required else extractor.default
+            for extractor in self.extractors.values()
+        )
+        self._alias_to_index = {
+            extractor.alias: (index, extractor)
+            for index, extractor in enumerate(self.extractors.values())
+        }
 
-def _raise_if_not_part_name(part, location):
-    if not part.name:
+    async def extract(self, request: web.Request):
+        values = list(self._defaults)
+        async for part in self._iter_parts(request):
+            index_extractor = self._alias_to_index.get(_get_part_name(part, self._in_))
+            if index_extractor is not None:
+                index, part_extractor = index_extractor
+                values[index] = await part_extractor.extract(part)
+        for value, part_extractor in zip(values, self.extractors.values()):
+            if value is Undefined:
+                raise exceptions.MissingValueError(part_extractor.alias, self._in_)
+        return self._values_type._make(values)
+
+
+def _get_part_name(part, location) -> str:
+    """Return name of part, it is parsed from headers on every access."""
+    name = part.name
+    if not name:
         raise web.HTTPBadRequest(
             headers={"Content-type": "application/json"},
             body=json.dumps(
@@ -316,11 +1010,468 @@ def _raise_if_not_part_name(part, location):
                         "Name is required in Content-Disposition header, "
                         "got {}".format(part.headers["Content-Disposition"])
                     ),
-                    "in": location,
+                    "in": location.value,
                     "type": "MissingValueError",
                 }
             ),
         )
+    return name
+
+
+async def _read_body(source, max_bytes, location, name="__root__") -> bytes:
+    """
+    Return body of request or part of multipart body.
+
+    Raise PayloadTooLargeError as soon as more than `max_bytes` is received.
+    """
+    if not isinstance(source, aiohttp.BodyPartReader):
+        if max_bytes is None and _BODY_KEY not in source:
+            if _get_content_encoding(source, location) is None:
+                return await source.read()
+            # Decompressed body is limited like body read by `request.read()`
+            max_bytes = settings.get_settings(source).max_decompressed_bytes
+        _check_content_length(source, max_bytes, location, name)
+        body = b"".join(
+            [chunk async for chunk in _iter_chunks(source, max_bytes, location)]
+        )
+        # Stream is consumed, other extractors of request get body from here
+        source[_BODY_KEY] = body
+        return body
+
+    if max_bytes is None:
+        return await source.read(decode=True)
+    _check_content_length(source, max_bytes, location, name)
+    chunks, size = [], 0
+    while chunk := await source.read_chunk():
+        size += len(chunk)
+        if size > max_bytes:
+            raise _payload_too_large(name, location, max_bytes)
+        chunks.append(chunk)
+    return source.decode(b"".join(chunks))
+
+
+_SPOOL_CHUNK_SIZE = 2**16
+
+
+async def _spool_part(
+    request, part, name: str, threshold: int, max_bytes, location
+) -> SpooledFile:
+    """
+    Return part of multipart body written to spooled file by fixed-size chunks.
+
+    Chunks are written to disk in executor, once file is rolled over to disk.
+    """
+    file = SpooledFile(
+        threshold, filename=part.filename, content_type=part.headers.get("Content-Type")
+    )
+    _add_cleanup(request, file.close)
+    loop = asyncio.get_running_loop()
+    async for chunk in _iter_part_chunks(part, max_bytes, location, name):
+        file.size += len(chunk)
+        if file.size > threshold:
+            await loop.run_in_executor(None, file.write, chunk)
+        else:
+            file.write(chunk)
+    file.seek(0)
+    return file
+
+
+async def _iter_part_chunks(
+    part, max_bytes, location, name: str
+) -> t.AsyncIterator[bytes]:
+    """Yield decoded content of multipart part by fixed-size chunks."""
+    if hdrs.CONTENT_ENCODING in part.headers or (
+        hdrs.CONTENT_TRANSFER_ENCODING in part.headers
+    ):
+        # Encoded part can not be decoded chunk by chunk
+        yield await _read_body(part, max_bytes, location, name)
+        return
+    _check_content_length(part, max_bytes, location, name)
+    size = 0
+    while chunk := await part.read_chunk(_SPOOL_CHUNK_SIZE):
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise _payload_too_large(name, location, max_bytes)
+        yield chunk
+
+
+_CLEANUP_KEY = "aiohttp_openapi.cleanup"
+_BODY_KEY = "aiohttp_openapi.body"
+
+
+def _add_cleanup(request: web.Request, callback: t.Callable[[], t.Any]):
+    """Register callback to be called when handler of request returns."""
+    request.setdefault(_CLEANUP_KEY, []).append(callback)
+
+
+def _run_cleanups(request: web.Request):
+    for callback in reversed(request.pop(_CLEANUP_KEY, ())):
+        callback()
+
+
+_DECOMPRESSED_CHUNK_SIZE = 2**16
+DECOMPRESSED_ENCODINGS = ("gzip", "x-gzip", "deflate")
+
+
+def _get_content_encoding(request: web.Request, location) -> t.Optional[str]:
+    """
+    Return encoding of body to be decompressed by extractor, None if there is none.
+
+    Raise UnsupportedEncodingError (415) for unknown encodings.
+    """
+    if not settings.get_settings(request).decompress:
+        return None
+    encoding = request.headers.get(hdrs.CONTENT_ENCODING, "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding not in DECOMPRESSED_ENCODINGS:
+        raise exceptions.UnsupportedEncodingError("__root__", location, encoding)
+    return encoding
+
+
+def _check_not_encoded(request: web.Request, location):
+    """Raise UnsupportedEncodingError if body should be decompressed by extractor."""
+    encoding = _get_content_encoding(request, location)
+    if encoding is not None:
+        raise exceptions.UnsupportedEncodingError("__root__", location, encoding)
+
+
+async def _decompress(
+    chunks: t.AsyncIterator[bytes], encoding: str, location
+) -> t.AsyncIterator[bytes]:
+    """
+    Yield decompressed body by chunks of bounded size.
+
+    Output of each step is bounded, so that small chunk of compressed "bomb"
+    is not inflated at once and size limits are checked in time.
+    """
+    decompressor = None
+    try:
+        async for chunk in chunks:
+            if decompressor is None:
+                decompressor = zlib.decompressobj(_get_wbits(encoding, chunk))
+            while chunk:
+                data = decompressor.decompress(chunk, _DECOMPRESSED_CHUNK_SIZE)
+                chunk = decompressor.unconsumed_tail
+                if data:
+                    yield data
+        if decompressor is None:  # empty body
+            return
+        if data := decompressor.flush():
+            yield data
+    except zlib.error as e:
+        raise _wrong_compression(encoding, location, e)
+    if not decompressor.eof:
+        raise _wrong_compression(encoding, location, "unexpected end of data")
+
+
+def _get_wbits(encoding: str, first_chunk: bytes) -> int:
+    if encoding != "deflate":
+        return 16 + zlib.MAX_WBITS  # gzip
+    # "deflate" is zlib stream by standard, but some clients send raw deflate
+    if len(first_chunk) > 1:
+        header = first_chunk[0] << 8 | first_chunk[1]
+        if first_chunk[0] & 0x0F == 8 and header % 31 == 0:
+            return zlib.MAX_WBITS
+    return -zlib.MAX_WBITS
+
+
+def _wrong_compression(encoding, location, reason):
+    return exceptions.WrongValueError(
+        "__root__", location, ValueError(f"Invalid {encoding} body: {reason}")
+    )
+
+
+def _check_content_length(source, max_bytes, location, name="__root__"):
+    if max_bytes is None:
+        return
+    if isinstance(source, aiohttp.BodyPartReader):
+        content_length = source.headers.get(hdrs.CONTENT_LENGTH)
+        content_length = int(content_length) if content_length else None
+    else:
+        content_length = source.content_length
+    if content_length is not None and content_length > max_bytes:
+        raise _payload_too_large(name, location, max_bytes)
+
+
+def _check_received_size(request: web.Request, max_bytes, location):
+    """Raise PayloadTooLargeError if more than `max_bytes` of body is received."""
+    # Received size includes buffered data, so it is ahead of size read
+    if max_bytes is not None and request.content.total_bytes > max_bytes:
+        raise _payload_too_large("__root__", location, max_bytes)
+
+
+def _payload_too_large(name, location, max_bytes):
+    return exceptions.PayloadTooLargeError(
+        name, location, f"Body is larger than {max_bytes} bytes"
+    )
+
+
+def _get_charset(source) -> str:
+    if isinstance(source, aiohttp.BodyPartReader):
+        return source.get_charset(default="utf-8")
+    return source.charset or "utf-8"
+
+
+# Strings are matched as a whole to skip brackets and commas inside them
+_JSON_STRUCTURE = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},]')
+
+
+def _check_json_limits(body: bytes, max_depth, max_items, location, name="__root__"):
+    """
+    Raise LimitExceededError if JSON document is too deep or has too many items.
+
+    Only structure of document is scanned, without decoding, so deeply nested
+    document is rejected before decoder recurses into it.
+    """
+    commas = []  # amount of commas in every open array or object
+    for match in _JSON_STRUCTURE.finditer(body):
+        char = body[match.start()]
+        if char in b"[{":
+            commas.append(0)
+            if max_depth is not None and len(commas) > max_depth:
+                raise exceptions.LimitExceededError(
+                    name, location, f"JSON is nested deeper than {max_depth}"
+                )
+        elif char in b"]}":
+            if commas:
+                commas.pop()
+        elif char == ord(","):
+            if commas:
+                commas[-1] += 1
+                if max_items is not None and commas[-1] >= max_items:
+                    raise exceptions.LimitExceededError(
+                        name,
+                        location,
+                        f"JSON array or object has more than {max_items} items",
+                    )
+
+
+async def _iter_chunks(request, max_bytes, location) -> t.AsyncIterator[bytes]:
+    """
+    Yield chunks of body as they arrive, not more than `max_bytes` in total.
+
+    Body is decompressed if it is enabled in settings, see `Body`.
+    """
+    encoding = _get_content_encoding(request, location)
+    if _BODY_KEY in request:  # already read and decompressed by `_read_body`
+        chunks = _iter_read_body(request[_BODY_KEY])
+        encoding = None
+    elif request.content.at_eof():
+        # Body is read by `request.read()` (e.g. in middleware), it is kept there
+        chunks = _iter_read_body(await request.read())
+    else:
+        chunks = request.content.iter_any()
+    if encoding is not None:
+        chunks = _decompress(chunks, encoding, location)
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise _payload_too_large("__root__", location, max_bytes)
+        yield chunk
+
+
+async def _iter_read_body(body: bytes) -> t.AsyncIterator[bytes]:
+    yield body
+
+
+async def _iter_batches(items: t.AsyncIterator, batch_size: int):
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _split_ndjson(chunks: t.AsyncIterator[bytes]) -> t.AsyncIterator[bytes]:
+    """Yield non-blank lines of newline delimited JSON."""
+    pending = []
+    async for chunk in chunks:
+        pending.append(chunk)
+        if b"\n" not in chunk:
+            continue
+        lines = b"".join(pending).split(b"\n")
+        pending = [lines.pop()]
+        for line in lines:
+            if line.strip():
+                yield line
+    tail = b"".join(pending)
+    if tail.strip():
+        yield tail
+
+
+_JSON_ARRAY_TOKENS = re.compile(rb'[\[\]{},"\\]')
+
+
+async def _split_json_array(
+    chunks: t.AsyncIterator[bytes], location
+) -> t.AsyncIterator[bytes]:
+    """
+    Yield raw items of JSON array.
+
+    Only strings and brackets are tracked to find bounds of items, so items are
+    not decoded twice. Only the item being received is kept in buffer.
+    """
+    buffer = bytearray()
+    item_start = None  # position of current item in buffer, None before "["
+    scanned, depth, count = 0, 0, 0
+    in_string, escaped_at, closed = False, -1, False
+    async for chunk in chunks:
+        if closed:
+            if chunk.strip():
+                raise _not_json_array(location, "Extra data after JSON array")
+            continue
+        buffer += chunk
+        items = []
+        for match in _JSON_ARRAY_TOKENS.finditer(buffer, scanned):
+            pos = match.start()
+            char = buffer[pos]
+            if in_string:
+                if pos == escaped_at:
+                    continue
+                if char == ord("\\"):
+                    escaped_at = pos + 1
+                elif char == ord('"'):
+                    in_string = False
+            elif item_start is None:
+                if char != ord("[") or buffer[:pos].strip():
+                    raise _not_json_array(location, "Expecting JSON array")
+                item_start, depth = pos + 1, 1
+            elif char == ord('"'):
+                in_string = True
+            elif char in b"[{":
+                depth += 1
+            elif char in b"]}":
+                depth -= 1
+                if depth == 0:
+                    raw_item = bytes(buffer[item_start:pos])
+                    if count or raw_item.strip():  # "[]" has no items
+                        items.append(raw_item)
+                    if buffer[pos + 1 :].strip():
+                        raise _not_json_array(location, "Extra data after JSON array")
+                    closed = True
+                    break
+            elif char == ord(",") and depth == 1:
+                items.append(bytes(buffer[item_start:pos]))
+                count += 1
+                item_start = pos + 1
+
+        for raw_item in items:
+            yield raw_item
+        if closed:
+            buffer.clear()
+        elif item_start is None:
+            if buffer.strip():
+                raise _not_json_array(location, "Expecting JSON array")
+            buffer.clear()
+        else:
+            del buffer[:item_start]
+            escaped_at -= item_start
+            item_start, scanned = 0, len(buffer)
+    if not closed:
+        raise _not_json_array(location, "Unterminated JSON array")
+
+
+def _not_json_array(location, msg):
+    return exceptions.WrongValueError("__root__", location, ValueError(msg))
+
+
+_IS_PYDANTIC_V2 = hasattr(pydantic.BaseModel, "model_validate_json")
+
+
+def _make_raw_validator(
+    model,
+) -> t.Callable[[bytes, codecs.JsonLoads], pydantic.BaseModel]:
+    """Return function that makes instance of model from JSON bytes and decoder."""
+    if not _is_pydantic_model(model):
+        raise exceptions.UnacceptableSignature(
+            f"from_raw=True requires pydantic model, got {model}"
+        )
+    if _IS_PYDANTIC_V2:
+
+        def validate_json(body: bytes, loads):
+            return model.model_validate_json(body)
+
+        return validate_json
+
+    def parse_raw(body: bytes, loads):
+        # `model.parse_raw` with decoder of extractor or application instead of
+        # `json_loads` from model Config, bytes are decoded without `str` copy
+        return model.parse_obj(loads(body))
+
+    return parse_raw
+
+
+def _get_array_item_type(parser):
+    """Return type of items if parser is `typing.List[...]`, None otherwise."""
+    if t.get_origin(parser) is not list:
+        return None
+    args = t.get_args(parser)
+    return args[0] if args else str
+
+
+_STYLE_DELIMITERS = {
+    "form": ",",
+    "simple": ",",
+    "spaceDelimited": " ",
+    "pipeDelimited": "|",
+}
+
+_ARRAY_TYPECODES = {int: "q", float: "d"}
+
+
+def _make_array_parser(item_type, delimiter: str, as_array: bool):
+    """
+    Return function that parses list of raw values or single delimited value.
+    """
+    parse_item = parsers.get_parser(item_type)
+    if as_array:
+        try:
+            typecode = _ARRAY_TYPECODES[item_type]
+        except KeyError:
+            raise exceptions.UnacceptableSignature(
+                f"as_array=True is supported only for {list(_ARRAY_TYPECODES)} "
+                f"items, got {item_type}"
+            )
+
+        def parse_array(raw_values):
+            if isinstance(raw_values, str):
+                raw_values = raw_values.split(delimiter)
+            try:
+                return array.array(typecode, map(parse_item, raw_values))
+            except OverflowError as e:
+                raise ValueError(str(e))
+
+    else:
+
+        def parse_array(raw_values):
+            if isinstance(raw_values, str):
+                raw_values = raw_values.split(delimiter)
+            return list(map(parse_item, raw_values))
+
+    return parse_array
+
+
+_LOWERCASE_QUERY_KEY = "aiohttp_openapi.lowercase_query"
+
+
+def _get_lowercase_query(request: web.Request) -> MultiDict:
+    """
+    Return query of request with lowercase keys.
+
+    Index is built once per request and stored in request, so that lookup of
+    each query parameter costs O(1) instead of scanning all keys of query.
+    """
+    try:
+        return request[_LOWERCASE_QUERY_KEY]
+    except KeyError:
+        query = MultiDict((key.lower(), value) for key, value in request.query.items())
+        request[_LOWERCASE_QUERY_KEY] = query
+        return query
 
 
 def _is_pydantic_model(cls):
@@ -5,6 +5,7 @@ But it knows about extractors.
 """
 import inspect
 import logging
+import types
 import typing as t
 
 from aiohttp_openapi import exceptions
@@ -27,13 +28,57 @@ class InspectInfo(t.NamedTuple):
     docstring: str = None
 
 
+class ExtractionPlan(t.NamedTuple):
+    """
+    Immutable description of how to get arguments of handler from request.
+
+    Plan is built once for handler and set of path parameters of the route, so
+    request processing does not inspect signature or create extractors.
+    Synchronous extractors are stored separately as pairs of parameter name and
+    bound `extract_sync` method, the rest are pairs of name and extractor.
+    If `sync_parser` is set, it is used instead of `sync_extractors` (see
+    `codegen.make_sync_parser`).
+    """
+
+    extractors: t.Mapping[str, extractors.Extractor]
+    unmatched: t.Tuple[str, ...]
+    inspect_info: InspectInfo
+    sync_extractors: t.Tuple[t.Tuple[str, t.Callable], ...] = ()
+    async_extractors: t.Tuple[t.Tuple[str, extractors.Extractor], ...] = ()
+    sync_parser: t.Optional[t.Callable] = None
+
+
+def make_extraction_plan(
+    openapi_handler, path_param_names=None, case_sensitive_query=False
+) -> ExtractionPlan:
+    """Return extraction plan for handler and names of path parameters."""
+    param_extractors, unmatched, inspect_info = make_extractors_for_handler(
+        openapi_handler, path_param_names, case_sensitive_query
+    )
+    return ExtractionPlan(
+        extractors=types.MappingProxyType(param_extractors),
+        unmatched=tuple(unmatched),
+        inspect_info=inspect_info,
+        sync_extractors=tuple(
+            (name, extractor.extract_sync)
+            for name, extractor in param_extractors.items()
+            if extractor._sync_
+        ),
+        async_extractors=tuple(
+            (name, extractor)
+            for name, extractor in param_extractors.items()
+            if not extractor._sync_
+        ),
+    )
+
+
 def make_extractors_for_handler(
-    openapi_handler, path_param_names=None
+    openapi_handler, path_param_names=None, case_sensitive_query=False
 ) -> t.Tuple[t.Dict[str, extractors.Extractor], t.List[str], InspectInfo]:
     """Return map of python parameter name to extractor and func info."""
     inspect_info = _inspect_openapi_handler(openapi_handler)
     param_extractors, unmatched = _make_extractors_from_params_info(
-        inspect_info.params_info, path_param_names
+        inspect_info.params_info, path_param_names, case_sensitive_query
     )
     if len(unmatched) > 2:
         try:
@@ -72,7 +117,9 @@ def _inspect_openapi_handler(func) -> InspectInfo:
 
 
 def _make_extractors_from_params_info(
-    params_info: t.Dict[str, ParamInfo], path_param_names: t.Set = None
+    params_info: t.Dict[str, ParamInfo],
+    path_param_names: t.Set = None,
+    case_sensitive_query=False,
 ) -> t.Tuple[t.Dict[str, extractors.Extractor], t.List[str]]:
     """
     Make extractors from default and annotation.
@@ -115,15 +162,26 @@ def _make_extractors_from_params_info(
                 )
             body_seen = param_name
 
-        if isinstance(extractor, extractors.Param) and path_param_names is not None:
+        extractor_cls = None
+        if type(extractor) is extractors.Param and path_param_names is not None:
             # For Param we should define if it is Query or Path.
             # path_param_names==None is special case for testing and the best
             # that we can do without information about path parameters from app
             if (extractor.alias or param_name) in path_param_names:
                 extractor_cls = extractors._Path
+            elif case_sensitive_query:
+                extractor_cls = extractors._CaseSensitiveQuery
             else:
                 extractor_cls = extractors._Query
-            extractor = extractor_cls(*extractor.init_args, **extractor.init_kwargs)
+        elif isinstance(extractor, (extractors.Header, extractors.Cookie)):
+            # Header or Cookie may be shared by handlers under different names,
+            # key of lookup is set by python_name below
+            extractor_cls = type(extractor)
+        if extractor_cls is not None:
+            param = extractor
+            extractor = extractor_cls(*param.init_args, **param.init_kwargs)
+            # Memoized values are shared with Param declared in signature
+            extractor._parse = param._parse
 
         extractor.python_name = param_name
         result[param_name] = extractor
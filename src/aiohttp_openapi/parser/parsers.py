@@ -0,0 +1,160 @@
+"""
+Registry of parsers for path, query, header and cookie parameters.
+
+Parser of parameter declared by user (e.g. `Param(bool)`) is a type, and calling
+it on raw string is not always correct (`bool("false") is True`) or fast.
+Registry maps such types to functions that parse strings, and to type and format
+used in OpenAPI schema, so that documented type and runtime parser always agree.
+Parser is selected once, when extractor is created.
+"""
+
+import datetime
+import enum
+import functools
+import json
+import typing as t
+import uuid
+
+
+class ParserInfo(t.NamedTuple):
+    """
+    Registered parser of type.
+
+    Attributes:
+        parse: callable that turns string into value, raises ValueError.
+        schema_type: `type` of the value in OpenAPI schema.
+        schema_format: `format` of the value in OpenAPI schema.
+        pure: result depends only on argument, is immutable and parser has no
+            side effects, so results of parsing may be cached.
+    """
+
+    parse: t.Callable[[str], t.Any]
+    schema_type: str
+    schema_format: t.Optional[str] = None
+    pure: bool = False
+
+
+_registry: t.Dict[type, ParserInfo] = {}
+
+
+def register_parser(
+    cls: type,
+    parse: t.Callable[[str], t.Any] = None,
+    *,
+    schema_type: str = "string",
+    schema_format: str = None,
+    pure: bool = False,
+):
+    """
+    Register parser for parameters declared with type `cls`.
+
+    If `parse` is None, `cls` itself is used to parse values.
+    """
+    _registry[cls] = ParserInfo(
+        parse=parse if parse is not None else cls,
+        schema_type=schema_type,
+        schema_format=schema_format,
+        pure=pure,
+    )
+
+
+def get_parser_info(cls) -> t.Optional[ParserInfo]:
+    """Return registered parser for type, None if type is not registered."""
+    try:
+        return _registry.get(cls)
+    except TypeError:  # unhashable
+        return None
+
+
+def get_parser(parser) -> t.Callable[[str], t.Any]:
+    """Return the fastest known function that does the same as `parser`."""
+    parser_info = get_parser_info(parser)
+    if parser_info is not None:
+        return parser_info.parse
+    if isinstance(parser, enum.EnumMeta):
+        return _make_enum_parser(parser)
+    return parser
+
+
+def is_pure(parser) -> bool:
+    """Return True if parser declared to be pure (see `ParserInfo`)."""
+    if isinstance(parser, enum.EnumMeta):
+        return True
+    parser_info = get_parser_info(parser)
+    return parser_info is not None and parser_info.pure
+
+
+def _make_enum_parser(enum_cls: enum.EnumMeta) -> t.Callable[[str], enum.Enum]:
+    """
+    Return parser for enumeration that uses precomputed value to member map.
+
+    Values are accepted both as is and as strings (e.g. "1" for `IntEnum`).
+    """
+    members = {}
+    for member in enum_cls:
+        members.setdefault(str(member.value), member)
+    for member in enum_cls:
+        try:
+            members.setdefault(member.value, member)
+        except TypeError:  # unhashable value
+            pass
+
+    def parse_enum(raw_value):
+        try:
+            return members[raw_value]
+        except (KeyError, TypeError):
+            raise ValueError(f"{raw_value!r} is not a valid {enum_cls.__name__}")
+
+    return parse_enum
+
+
+_BOOL_VALUES = {
+    "true": True,
+    "1": True,
+    "yes": True,
+    "on": True,
+    "false": False,
+    "0": False,
+    "no": False,
+    "off": False,
+}
+
+
+def _parse_bool(raw_value: str) -> bool:
+    try:
+        return _BOOL_VALUES[raw_value.lower()]
+    except KeyError:
+        raise ValueError(f"{raw_value!r} is not a valid boolean")
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_uuid(raw_value: str) -> uuid.UUID:
+    return uuid.UUID(raw_value)
+
+
+def _parse_object(raw_value: str) -> dict:
+    value = json.loads(raw_value)
+    if not isinstance(value, dict):
+        raise ValueError(f"{raw_value!r} is not a valid object")
+    return value
+
+
+register_parser(dict, _parse_object, schema_type="object")
+register_parser(bytes, str.encode, schema_format="binary", pure=True)
+register_parser(
+    bytearray, functools.partial(bytearray, encoding="utf-8"), schema_format="binary"
+)
+register_parser(str, schema_type="string", pure=True)
+register_parser(bool, _parse_bool, schema_type="boolean", pure=True)
+register_parser(int, schema_type="integer", pure=True)
+register_parser(float, schema_type="number", pure=True)
+register_parser(
+    datetime.date, datetime.date.fromisoformat, schema_format="date", pure=True
+)
+register_parser(
+    datetime.datetime,
+    datetime.datetime.fromisoformat,
+    schema_format="date-time",
+    pure=True,
+)
+register_parser(uuid.UUID, _parse_uuid, schema_format="uuid", pure=True)
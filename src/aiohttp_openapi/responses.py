@@ -0,0 +1,323 @@
+"""
+Responses in format negotiated with client.
+
+Format is chosen by `Accept` header of request. If client accepts any format,
+response has the same format as request body, JSON is used by default.
+
+Values returned by `openapi_view` handlers are encoded here as well, JSON
+encoder is taken from application settings. Async iterators are streamed item
+by item as JSON array or newline delimited JSON. Sample of returned values may
+be validated against return annotation of handler.
+"""
+
+import collections.abc
+import hashlib
+import inspect
+import logging
+import random
+import typing as t
+
+import pydantic
+from aiohttp import hdrs, web
+from aiohttp.helpers import ETag
+
+from . import codecs, exceptions, settings
+from .parser import extractors
+from .parser.enums import ContentType
+
+DEFAULT_CONTENT_TYPES = (ContentType.application_json, ContentType.application_msgpack)
+STREAM_CONTENT_TYPES = (ContentType.application_json, ContentType.application_x_ndjson)
+
+# Returned async iterators are streamed as arrays, so documented as lists
+STREAMED_GENERICS = (
+    collections.abc.AsyncIterator,
+    collections.abc.AsyncIterable,
+    collections.abc.AsyncGenerator,
+)
+
+# Encoders other than JSON one, which is configured by application
+_ENCODERS = {
+    ContentType.application_msgpack: codecs.msgpack_dumps,
+}
+
+# Media type in request -> format of response
+_REQUEST_CONTENT_TYPES = {
+    **{name: ContentType.application_json for name in extractors.JSON_CONTENT_TYPES},
+    **{
+        name: ContentType.application_msgpack
+        for name in extractors.MSGPACK_CONTENT_TYPES
+    },
+    **{
+        name: ContentType.application_x_ndjson
+        for name in extractors.NDJSON_CONTENT_TYPES
+    },
+}
+
+
+def make_response(
+    request: web.Request,
+    data,
+    *,
+    status: int = 200,
+    content_types: t.Sequence[ContentType] = DEFAULT_CONTENT_TYPES,
+    headers=None,
+) -> web.Response:
+    """
+    Return response with data encoded in format negotiated with client.
+
+    `data` may contain pydantic models, dates, UUIDs, enumerations etc.
+    Content types without encoder (e.g. zip) accept only bytes.
+    """
+    if len(content_types) == 1:
+        content_type = content_types[0]
+    else:
+        content_type = negotiate_content_type(request, content_types)
+    return web.Response(
+        body=encode(request, data, content_type),
+        status=status,
+        content_type=content_type.value,
+        headers=headers,
+    )
+
+
+def encode(request: web.Request, data, content_type: ContentType) -> bytes:
+    """Return data encoded to content type, data is encoded only once."""
+    if content_type is ContentType.application_json:
+        return settings.get_settings(request).json_dumps(data)
+    if content_type is ContentType.application_x_ndjson:
+        dumps = settings.get_settings(request).json_dumps
+        return b"".join([dumps(item) + b"\n" for item in data])
+    encoder = _ENCODERS.get(content_type)
+    if encoder is not None:
+        return encoder(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    raise TypeError(
+        f"Can not encode {type(data).__name__} to {content_type.value}, "
+        "return bytes or web.Response instead"
+    )
+
+
+async def stream_response(
+    request: web.Request,
+    items: t.AsyncIterable,
+    *,
+    status: int = 200,
+    content_types: t.Sequence[ContentType] = STREAM_CONTENT_TYPES,
+    headers=None,
+    flush_bytes: int = None,
+    content_encoding: str = None,
+) -> web.StreamResponse:
+    """
+    Write items to chunked response as JSON array or newline delimited JSON.
+
+    Encoded items are sent when at least `flush_bytes` of them are collected
+    (`stream_flush_bytes` setting by default). Exception raised by `items`
+    before the first item is propagated before response is started, so
+    handler errors still get their own responses. Chunks are compressed with
+    `content_encoding` if it is given.
+    """
+    stream_types = [c for c in content_types if c in STREAM_CONTENT_TYPES]
+    if not stream_types:
+        raise TypeError(
+            "Async iterator can be streamed only as "
+            + ", ".join(c.value for c in STREAM_CONTENT_TYPES)
+        )
+    content_type = negotiate_content_type(request, stream_types)
+    app_settings = settings.get_settings(request)
+    dumps = app_settings.json_dumps
+    if flush_bytes is None:
+        flush_bytes = app_settings.stream_flush_bytes
+    if content_type is ContentType.application_x_ndjson:
+        opening, delimiter, closing = b"", b"\n", b"\n"
+    else:
+        opening, delimiter, closing = b"[", b",", b"]"
+
+    iterator = items.__aiter__()
+    try:
+        buffer = bytearray(opening + dumps(await iterator.__anext__()))
+    except StopAsyncIteration:
+        # Empty array or no lines at all
+        buffer, iterator = bytearray(b"[]" if opening else b""), None
+
+    response = web.StreamResponse(status=status, headers=headers)
+    response.content_type = content_type.value
+    response.enable_chunked_encoding()
+    if content_encoding is not None:
+        response.enable_compression(web.ContentCoding(content_encoding))
+    await response.prepare(request)
+    if iterator is not None:
+        try:
+            async for item in iterator:
+                if len(buffer) >= flush_bytes:
+                    await response.write(buffer)
+                    buffer = bytearray()
+                buffer += delimiter
+                buffer += dumps(item)
+        except exceptions.ValidationError as e:
+            # Status is sent already, client gets incomplete body instead
+            raise RuntimeError("Streamed response is interrupted") from e
+        buffer += closing
+    await response.write(buffer)
+    await response.write_eof()
+    return response
+
+
+def make_cache_headers(
+    max_age: t.Optional[int], vary: t.Sequence[str] = (), *, negotiated=False
+) -> t.Dict[str, str]:
+    """Return Cache-Control and Vary headers, `Accept` varies negotiated format."""
+    headers = {}
+    if max_age is not None:
+        headers[hdrs.CACHE_CONTROL] = f"max-age={max_age}"
+    vary = list(vary)
+    if negotiated and hdrs.ACCEPT not in vary:
+        vary.append(hdrs.ACCEPT)
+    if vary:
+        headers[hdrs.VARY] = ", ".join(vary)
+    return headers
+
+
+def make_body_etag(body: bytes, weak=False) -> ETag:
+    """
+    Return ETag of encoded response.
+
+    It should be weak if body may be compressed, compressed body differs.
+    """
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return ETag(value=digest, is_weak=weak)
+
+
+def make_version_etag(version) -> ETag:
+    """
+    Return weak ETag of version of value given by handler.
+
+    It is weak because responses with different formats have the same version.
+    """
+    return ETag(value=str(version), is_weak=True)
+
+
+def is_not_modified(request: web.Request, etag: ETag) -> bool:
+    """Return True if `If-None-Match` of request matches ETag (weakly)."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    return any(tag.value in (etag.value, "*") for tag in if_none_match)
+
+
+def not_modified(etag: ETag, headers=None) -> web.Response:
+    """Return bodyless 304 response, `headers` are the same as in full one."""
+    response = web.Response(status=304, headers=headers)
+    response.etag = etag
+    return response
+
+
+def negotiate_content_type(
+    request: web.Request,
+    content_types: t.Sequence[ContentType] = DEFAULT_CONTENT_TYPES,
+) -> ContentType:
+    """
+    Return one of `content_types` preferred by client.
+
+    The first of `content_types` is used if client accepts none of them.
+    """
+    default = _REQUEST_CONTENT_TYPES.get(request.content_type)
+    if default not in content_types:
+        default = content_types[0]
+    accept = request.headers.get(hdrs.ACCEPT)
+    if not accept:
+        return default
+
+    best, best_quality = default, 0.0
+    for media_range, quality in _parse_accept(accept):
+        if media_range in ("*/*", "application/*"):
+            content_type = default
+        else:
+            content_type = _REQUEST_CONTENT_TYPES.get(media_range)
+            if content_type not in content_types:
+                continue
+        if quality > best_quality:
+            best, best_quality = content_type, quality
+    return best
+
+
+class ResponseValidator:
+    """
+    Validate sample of values returned by handler against its return annotation.
+
+    Mismatches are logged and counted, response is sent anyway. Share of
+    validated responses is `validate_responses` option of `openapi_view` or
+    application settings, deciding whether to validate costs one random number.
+
+    Attributes:
+        validated: amount of validated responses.
+        failed: amount of responses that do not match return annotation.
+    """
+
+    def __init__(self, handler_name: str, model: t.Type[pydantic.BaseModel]):
+        self.handler_name = handler_name
+        self.model = model
+        self.validated = 0
+        self.failed = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.handler_name!r}, "
+            f"validated={self.validated}, failed={self.failed})"
+        )
+
+    @classmethod
+    def for_handler(cls, handler, return_type) -> t.Optional["ResponseValidator"]:
+        """Return validator, None if returned values can not be validated."""
+        if return_type is None or t.get_origin(return_type) in STREAMED_GENERICS:
+            return None
+        if inspect.isclass(return_type) and issubclass(return_type, web.StreamResponse):
+            return None
+        try:
+            model = pydantic.create_model(
+                f"{handler.__name__}_response", __root__=(return_type, ...)
+            )
+        except (RuntimeError, TypeError):  # type unknown to pydantic
+            return None
+        return cls(handler.__qualname__, model)
+
+    def maybe_validate(self, request: web.Request, data, rate: float = None):
+        if rate is None:
+            rate = settings.get_settings(request).validate_responses
+        if rate and random.random() < rate:
+            if not isinstance(data, collections.abc.AsyncIterable):
+                self.validate(data)
+
+    def validate(self, data) -> bool:
+        self.validated += 1
+        try:
+            self.model.parse_obj(data)
+        except pydantic.ValidationError as e:
+            self.failed += 1
+            logger.warning(
+                f"Response of {self.handler_name} does not match "
+                f"return annotation: {e.errors()}"
+            )
+            return False
+        except Exception:
+            self.failed += 1
+            logger.exception(f"Can not validate response of {self.handler_name}")
+            return False
+        return True
+
+
+def _parse_accept(accept: str) -> t.Iterator[t.Tuple[str, float]]:
+    for item in accept.split(","):
+        media_range, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        yield media_range.strip().lower(), quality
+
+
+logger = logging.getLogger(__name__)
@@ -0,0 +1,107 @@
+"""
+Application-wide settings of the package.
+
+Settings are stored in application and may be overridden for particular
+extractor or view. Requests of application without settings use defaults.
+"""
+
+import dataclasses
+import json
+import typing as t
+
+from aiohttp import web
+
+from . import codecs
+
+if t.TYPE_CHECKING:
+    from .compression import CompressionPolicy
+
+try:
+    SETTINGS_KEY = web.AppKey("aiohttp_openapi_settings", object)
+except AttributeError:  # aiohttp < 3.9
+    SETTINGS_KEY = "aiohttp_openapi_settings"
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    """
+    Attributes:
+        json_loads: decoder of JSON request bodies, accepts bytes.
+        json_dumps: encoder of JSON responses made from values returned by
+            handlers, returns bytes.
+        stream_flush_bytes: responses streamed from async iterators returned
+            by handlers are written in chunks of at least this size.
+        validate_responses: share of values returned by handlers that are
+            validated against return annotation, from 0 to 1. Mismatches are
+            logged and counted by `handler.response_validator`.
+        compression: `CompressionPolicy` of responses made from values returned
+            by handlers, True for default policy.
+        max_body_bytes: maximal size of request body read by body extractors.
+        max_json_depth: maximal nesting of arrays and objects in JSON body.
+        max_json_items: maximal amount of items in array or object in JSON body.
+        max_part_bytes: maximal size of part of multipart body.
+        spool_threshold: binary parts of multipart form read by
+            `MultipleFileUpload` are spooled to temporary files, which are kept
+            in memory until they are larger than this size.
+        decompress: body extractors decompress gzip and deflate bodies. Enable
+            it for servers run with `auto_decompress=False`, otherwise aiohttp
+            decompresses bodies itself.
+        max_decompressed_bytes: maximal size of decompressed body read at once
+            by extractors without `max_body_bytes`, like `client_max_size` of
+            application limits bodies that aiohttp decompresses itself.
+    """
+
+    json_loads: codecs.JsonLoads = json.loads
+    json_dumps: codecs.JsonDumps = codecs.json_dumps
+    stream_flush_bytes: int = 2**16
+    validate_responses: float = 0.0
+    compression: t.Union[bool, "CompressionPolicy", None] = None
+    max_body_bytes: t.Optional[int] = None
+    max_json_depth: t.Optional[int] = None
+    max_json_items: t.Optional[int] = None
+    max_part_bytes: t.Optional[int] = None
+    spool_threshold: t.Optional[int] = None
+    decompress: bool = False
+    max_decompressed_bytes: int = 2**20
+
+
+DEFAULT_SETTINGS = Settings()
+
+
+def configure(app: web.Application, **settings) -> Settings:
+    """
+    Set settings for application, see `Settings` for available options.
+
+    JSON decoder and encoder may be given by name,
+    e.g. `configure(app, json_loads="orjson", json_dumps="orjson")`.
+    """
+    if "json_loads" in settings:
+        settings["json_loads"] = codecs.get_json_loads(settings["json_loads"])
+    if "json_dumps" in settings:
+        settings["json_dumps"] = codecs.get_json_dumps(settings["json_dumps"])
+    app[SETTINGS_KEY] = app_settings = dataclasses.replace(
+        app.get(SETTINGS_KEY, DEFAULT_SETTINGS), **settings
+    )
+    return app_settings
+
+
+_PART_SETTINGS_ATTR = "_aiohttp_openapi_settings"
+
+
+def get_settings(request) -> Settings:
+    """
+    Return settings of application that handles request.
+
+    Settings of parent application are used for nested ones. Parts of multipart
+    body get settings of their request, see `set_part_settings`, other objects
+    without application get default settings.
+    """
+    config = getattr(request, "config_dict", None)
+    if config is None:
+        return getattr(request, _PART_SETTINGS_ATTR, DEFAULT_SETTINGS)
+    return config.get(SETTINGS_KEY, DEFAULT_SETTINGS)
+
+
+def set_part_settings(part, request):
+    """Make part of multipart body use settings of application of request."""
+    setattr(part, _PART_SETTINGS_ATTR, get_settings(request))
@@ -0,0 +1,353 @@
+"""
+Response cache shared by worker processes of one host.
+
+Cache is a table of fixed-size slots in memory-mapped file, e.g. in `/dev/shm`
+on Linux. Every worker maps the same file, so a response cached by one worker
+is a hit for others and is stored only once. No external service is needed.
+
+Slots are grouped in buckets of `ways` slots, key of response chooses bucket.
+Reads take no locks: slot has a sequence number that is odd while slot is
+written, and a checksum of its data, torn reads are treated as misses.
+Writers lock only their bucket with `fcntl` record lock. Within bucket the
+least recently used or expired slot is replaced.
+
+Handlers are told apart by module and qualified name, so handlers defined
+inside functions are not accepted. Arguments of handlers should be of types
+with the same repr in all processes, e.g. numbers, strings, UUIDs or dates.
+
+Requires POSIX (`fcntl`).
+"""
+
+import contextlib
+import datetime
+import decimal
+import enum
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+import typing as t
+import uuid
+import zlib
+
+from . import exceptions
+from .cache import (
+    CachedResponse,
+    CacheKey,
+    CacheStats,
+    ResponseCache,
+    _freeze,
+    _get_openapi_handler,
+)
+
+_MAGIC = b"AOCACHE1"
+# magic, slots, slot size, ways
+_FILE_HEADER = struct.Struct("<8sIII")
+_FILE_HEADER_SIZE = 64
+
+# seq, key, handler, arguments, expires, last used, crc, status, headers, body
+_SLOT_HEADER = struct.Struct("<I16s8s8sddIHII")
+_SLOT_HEADER_SIZE = 80
+_SEQ = struct.Struct("<I")
+_SEQ_MASK = 0xFFFFFFFF
+_LAST_USED = struct.Struct("<d")
+_LAST_USED_OFFSET = 4 + 16 + 8 + 8 + 8
+_EMPTY_KEY = bytes(16)
+
+
+class SharedMemoryCache(ResponseCache):
+    """
+    Cache of responses in memory-mapped file shared by worker processes.
+
+    Arguments:
+        path: file of cache, the same for all workers, created if missing.
+            Use RAM-backed file system, e.g. `/dev/shm/notes_cache`.
+        slots: amount of slots, i.e. maximal amount of cached responses.
+        slot_size: size of slot, larger responses are not cached.
+        ttl: seconds response is kept for, None means until it is evicted.
+        ways: amount of slots in bucket, LRU eviction is done within bucket.
+
+    Cache opened with different `slots`, `slot_size` or `ways` than existing
+    file raises ValueError. Hit, miss and eviction counts are per process.
+    """
+
+    def __init__(
+        self,
+        path: t.Union[str, os.PathLike],
+        *,
+        slots: int = 1024,
+        slot_size: int = 2**16,
+        ttl: float = None,
+        ways: int = 4,
+    ):
+        if slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError(f"slot_size should be larger than {_SLOT_HEADER_SIZE}")
+        if ways < 1 or slots < ways or slots % ways:
+            raise ValueError(f"slots ({slots}) should be multiple of ways ({ways})")
+        self.path = os.fspath(path)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ttl = ttl
+        self.ways = ways
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._buckets = slots // ways
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._map = self._open_map()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.path!r}, slots={self.slots}, "
+            f"slot_size={self.slot_size}, ttl={self.ttl}, ways={self.ways})"
+        )
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    @property
+    def stats(self) -> CacheStats:
+        size = total = 0
+        now = time.time()
+        for offset in self._iter_slots():
+            header = _SLOT_HEADER.unpack_from(self._map, offset)
+            if header[1] != _EMPTY_KEY and header[4] >= now:
+                size += 1
+                total += header[9]
+        return CacheStats(self.hits, self.misses, self.evictions, size, total)
+
+    def get(self, key: CacheKey) -> t.Optional[CachedResponse]:
+        key_digest = _make_digests(key)[0]
+        now = time.time()
+        for offset in self._iter_bucket(key_digest):
+            response = self._read_slot(offset, key_digest, now)
+            if response is not None:
+                self.hits += 1
+                return response
+        self.misses += 1
+        return None
+
+    def set(self, key: CacheKey, response: CachedResponse):
+        digests = _make_digests(key)
+        headers = "\r\n".join(f"{name}: {value}" for name, value in response.headers)
+        headers = headers.encode()
+        payload = headers + response.body
+        if len(payload) > self.slot_size - _SLOT_HEADER_SIZE:
+            return
+        now = time.time()
+        expires = now + self.ttl if self.ttl is not None else float("inf")
+        key_digest = digests[0]
+        with self._lock_bucket(key_digest):
+            offset = self._choose_slot(key_digest, now)
+            # Odd while slot is written, readers retry or miss
+            seq = _SEQ.unpack_from(self._map, offset)[0] | 1
+            _SEQ.pack_into(self._map, offset, seq)
+            data_offset = offset + _SLOT_HEADER_SIZE
+            self._map[data_offset : data_offset + len(payload)] = payload
+            _SLOT_HEADER.pack_into(
+                self._map,
+                offset,
+                seq,
+                *digests,
+                expires,
+                now,
+                zlib.crc32(payload),
+                response.status,
+                len(headers),
+                len(response.body),
+            )
+            _SEQ.pack_into(self._map, offset, (seq + 1) & _SEQ_MASK)
+
+    def invalidate(self, view: t.Callable = None, **arguments) -> int:
+        """
+        Remove responses of view (of any view by default).
+
+        Unlike `TTLCache.invalidate`, `arguments` should contain all arguments
+        of view if they are given, because keys are stored as digests.
+        """
+        handler_digest = arguments_digest = None
+        if view is not None:
+            handler_digest = _handler_digest(_get_openapi_handler(view))
+        if arguments:
+            frozen = tuple((name, _freeze(value)) for name, value in arguments.items())
+            arguments_digest = _arguments_digest(frozen)
+        removed = 0
+        for offset in self._iter_slots():
+            _, key, handler, args, *_ = _SLOT_HEADER.unpack_from(self._map, offset)
+            if key == _EMPTY_KEY:
+                continue
+            if handler_digest is not None and handler != handler_digest:
+                continue
+            if arguments_digest is not None and args != arguments_digest:
+                continue
+            if self._clear_slot(offset, key):
+                removed += 1
+        return removed
+
+    def check_handler(self, handler: t.Callable):
+        # Handlers made by the same factory function would share responses
+        if "<locals>" in handler.__qualname__:
+            raise exceptions.UnacceptableSignature(
+                f"{handler.__qualname__} is defined inside a function, "
+                f"{self.__class__.__name__} tells handlers apart by their names"
+            )
+
+    def clear(self):
+        for offset in self._iter_slots():
+            key = _SLOT_HEADER.unpack_from(self._map, offset)[1]
+            if key != _EMPTY_KEY:
+                self._clear_slot(offset, key)
+
+    def _open_map(self) -> mmap.mmap:
+        size = _FILE_HEADER_SIZE + self.slots * self.slot_size
+        header = _FILE_HEADER.pack(_MAGIC, self.slots, self.slot_size, self.ways)
+        with self._lock(0, _FILE_HEADER_SIZE):
+            existing = os.pread(self._fd, _FILE_HEADER.size, 0)
+            if existing[: len(_MAGIC)] != _MAGIC:
+                os.ftruncate(self._fd, size)  # new file, slots are zeros
+                os.pwrite(self._fd, header, 0)
+            elif existing != header:
+                _, slots, slot_size, ways = _FILE_HEADER.unpack(existing)
+                raise ValueError(
+                    f"Cache {self.path} has slots={slots}, "
+                    f"slot_size={slot_size}, ways={ways}"
+                )
+        return mmap.mmap(self._fd, size)
+
+    def _iter_slots(self) -> t.Iterator[int]:
+        return range(
+            _FILE_HEADER_SIZE,
+            _FILE_HEADER_SIZE + self.slots * self.slot_size,
+            self.slot_size,
+        )
+
+    def _bucket_offset(self, key_digest: bytes) -> int:
+        bucket = int.from_bytes(key_digest[:8], "little") % self._buckets
+        return _FILE_HEADER_SIZE + bucket * self.ways * self.slot_size
+
+    def _iter_bucket(self, key_digest: bytes) -> t.Iterator[int]:
+        start = self._bucket_offset(key_digest)
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    def _read_slot(self, offset, key_digest, now) -> t.Optional[CachedResponse]:
+        seq, key, _, _, expires, _, crc, status, headers_len, body_len = (
+            _SLOT_HEADER.unpack_from(self._map, offset)
+        )
+        if key != key_digest or seq & 1 or expires < now:
+            return None
+        data_offset = offset + _SLOT_HEADER_SIZE
+        payload = self._map[data_offset : data_offset + headers_len + body_len]
+        if _SEQ.unpack_from(self._map, offset)[0] != seq or zlib.crc32(payload) != crc:
+            return None  # slot is being written
+        # Approximate LRU, lost updates are harmless
+        _LAST_USED.pack_into(self._map, offset + _LAST_USED_OFFSET, now)
+        headers = tuple(
+            tuple(line.split(": ", 1))
+            for line in payload[:headers_len].decode().split("\r\n")
+            if line
+        )
+        return CachedResponse(status, payload[headers_len:], headers)
+
+    def _choose_slot(self, key_digest: bytes, now: float) -> int:
+        """Return slot with the same key, free or least recently used one."""
+        free = lru = None
+        lru_used = float("inf")
+        for offset in self._iter_bucket(key_digest):
+            _, key, _, _, expires, used, *_ = _SLOT_HEADER.unpack_from(
+                self._map, offset
+            )
+            if key == key_digest:
+                return offset
+            if key == _EMPTY_KEY or expires < now:
+                free = offset if free is None else free
+            elif used < lru_used:
+                lru, lru_used = offset, used
+        if free is not None:
+            return free
+        self.evictions += 1
+        return lru
+
+    def _clear_slot(self, offset: int, key_digest: bytes) -> bool:
+        with self._lock_bucket(key_digest):
+            seq, key = _SLOT_HEADER.unpack_from(self._map, offset)[:2]
+            if key != key_digest:
+                return False
+            _SEQ.pack_into(self._map, offset, seq | 1)
+            self._map[offset + 4 : offset + 20] = _EMPTY_KEY
+            _SEQ.pack_into(self._map, offset, ((seq | 1) + 1) & _SEQ_MASK)
+        return True
+
+    def _lock_bucket(self, key_digest: bytes):
+        return self._lock(self._bucket_offset(key_digest), self.ways * self.slot_size)
+
+    @contextlib.contextmanager
+    def _lock(self, start: int, length: int):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start, os.SEEK_SET)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start, os.SEEK_SET)
+
+
+def _make_digests(key: CacheKey) -> t.Tuple[bytes, bytes, bytes]:
+    """Return digests of key, handler and arguments."""
+    handler = _handler_digest(key.handler)
+    arguments = _arguments_digest(key.arguments)
+    variant = _stable_repr(key.variant).encode()
+    key_digest = hashlib.blake2b(handler + arguments + variant, digest_size=16)
+    return key_digest.digest(), handler, arguments
+
+
+def _handler_digest(handler) -> bytes:
+    name = f"{handler.__module__}.{handler.__qualname__}"
+    return hashlib.blake2b(name.encode(), digest_size=8).digest()
+
+
+def _arguments_digest(arguments) -> bytes:
+    # Sorted, so digest does not depend on order of keyword arguments
+    text = _stable_repr(tuple(sorted(arguments, key=lambda item: item[0])))
+    return hashlib.blake2b(text.encode(), digest_size=8).digest()
+
+
+# Types which repr is the same in all processes
+_STABLE_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    str,
+    bytes,
+    decimal.Decimal,
+    uuid.UUID,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    enum.Enum,
+)
+
+
+def _stable_repr(value) -> str:
+    """
+    Return repr that is the same in all processes (frozensets are sorted).
+
+    Raise UnacceptableSignature for values of other types, their repr may
+    differ, e.g. it has `id()` of object.
+    """
+    if isinstance(value, tuple):
+        return "(" + ",".join(map(_stable_repr, value)) + ")"
+    if isinstance(value, frozenset):
+        return "{" + ",".join(sorted(map(_stable_repr, value))) + "}"
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, _STABLE_TYPES):
+        return repr(value)
+    raise exceptions.UnacceptableSignature(
+        f"Value of {type(value).__name__} can not be part of key of shared cache"
+    )
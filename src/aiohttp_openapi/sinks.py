@@ -0,0 +1,182 @@
+"""
+Sinks consume uploaded body chunk by chunk, see `FileUploadTee`.
+
+Sink is a specification shared by all requests: `consume` is called for every
+upload with async iterator of chunks and returns result passed to handler.
+Sinks of one upload run concurrently and receive the same chunks, so the body
+is read only once.
+"""
+
+import abc
+import asyncio
+import hashlib
+import os
+import pathlib
+import tempfile
+import typing as t
+
+Chunks = t.AsyncIterator[bytes]
+
+
+class Sink(abc.ABC):
+    """
+    Base class of sinks.
+
+    Attributes:
+        name: name of the field with result of the sink in result of extractor.
+    """
+
+    name: str = None
+
+    def __init__(self, name: str = None):
+        if name is not None:
+            self.name = name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+    @abc.abstractmethod
+    async def consume(self, chunks: Chunks) -> t.Any:
+        """Read chunks and return result, may stop reading early."""
+        raise NotImplementedError
+
+    def discard(self, result):
+        """Release result of finished sink when another sink of upload fails."""
+
+
+class DiskSink(Sink):
+    """
+    Write body to new file in `directory` (temporary directory by default).
+
+    Result is path of the file, handler is responsible to move or remove it.
+    File is removed if upload or another sink fails. Writes are done in executor.
+    """
+
+    name = "path"
+
+    def __init__(self, directory=None, *, suffix="", name: str = None):
+        super().__init__(name)
+        self.directory = directory
+        self.suffix = suffix
+
+    async def consume(self, chunks: Chunks) -> pathlib.Path:
+        loop = asyncio.get_running_loop()
+        # Not in executor: path would be lost if the sink is cancelled meanwhile
+        fd, path = tempfile.mkstemp(suffix=self.suffix, dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in chunks:
+                    await loop.run_in_executor(None, file.write, chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return pathlib.Path(path)
+
+    def discard(self, result: pathlib.Path):
+        result.unlink(missing_ok=True)
+
+
+class HashSink(Sink):
+    """Return hex digest of body, `algorithm` is any name known to `hashlib`."""
+
+    def __init__(self, algorithm: str = "sha256", *, name: str = None):
+        hashlib.new(algorithm)  # fail early on unknown algorithm
+        super().__init__(name or algorithm)
+        self.algorithm = algorithm
+
+    async def consume(self, chunks: Chunks) -> str:
+        digest = hashlib.new(self.algorithm)
+        async for chunk in chunks:
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+class SizeSink(Sink):
+    """Return size of body in bytes."""
+
+    name = "size"
+
+    async def consume(self, chunks: Chunks) -> int:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+        return size
+
+
+class CallbackSink(Sink):
+    """
+    Await `callback(chunk)` for every chunk, e.g. to scan or forward body.
+
+    Result is returned by `finish()` if it is given, None otherwise.
+    """
+
+    def __init__(
+        self,
+        callback: t.Callable[[bytes], t.Awaitable],
+        finish: t.Callable[[], t.Any] = None,
+        *,
+        name: str,
+    ):
+        super().__init__(name)
+        self.callback = callback
+        self.finish = finish
+
+    async def consume(self, chunks: Chunks):
+        async for chunk in chunks:
+            await self.callback(chunk)
+        return self.finish() if self.finish is not None else None
+
+
+# Amount of chunks waiting for each sink, the slowest sink holds back reading
+_QUEUE_SIZE = 4
+
+
+async def tee(chunks: Chunks, sinks: t.Sequence[Sink]) -> t.List[t.Any]:
+    """
+    Feed each chunk to all sinks concurrently, return results of sinks.
+
+    Next chunk is read only when every sink has room for it. If any sink
+    fails, other sinks are cancelled, results of finished ones are discarded
+    and exception is raised.
+    """
+    queues = [asyncio.Queue(_QUEUE_SIZE) for _ in sinks]
+    tasks = [
+        asyncio.ensure_future(sink.consume(_iter_queue(queue)))
+        for sink, queue in zip(sinks, queues)
+    ]
+    try:
+        async for chunk in chunks:
+            await _put_all(queues, tasks, chunk)
+        await _put_all(queues, tasks, None)
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for sink, task in zip(sinks, tasks):
+            if not task.cancelled() and task.exception() is None:
+                sink.discard(task.result())
+        raise
+
+
+async def _put_all(queues, tasks, item):
+    for queue, task in zip(queues, tasks):
+        if task.done():
+            task.result()  # raise exception of sink, skip sink that has finished
+        elif not queue.full():
+            queue.put_nowait(item)
+        else:
+            put = asyncio.ensure_future(queue.put(item))
+            try:
+                await asyncio.wait((put, task), return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                put.cancel()
+                raise
+            if not put.done():
+                put.cancel()
+                task.result()
+
+
+async def _iter_queue(queue: asyncio.Queue) -> Chunks:
+    while (chunk := await queue.get()) is not None:
+        yield chunk
@@ -1,5 +1,4 @@
 import datetime
-import json
 import uuid
 
 import pydantic
@@ -35,7 +34,7 @@ async def get_note(id: uuid.UUID) -> models.Note:
     if not note:
         return web.json_response(reason="Note not found", status=404)
 
-    return web.json_response(text=note.json())
+    return note
 
 
 @openapi_view
@@ -50,9 +49,7 @@ async def list_notes(
     if sort_string is not None:
         assert isinstance(sort_string, str)
     notes = list(models.database.values())
-    return web.json_response(
-        [json.loads(note.json()) for note in notes[offset : offset + limit]]
-    )
+    return notes[offset : offset + limit]
 
 
 def setup_routes(app):
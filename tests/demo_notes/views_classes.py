@@ -1,5 +1,4 @@
 import datetime
-import json
 import typing as t
 import uuid
 
@@ -21,7 +20,7 @@ class NoteDetailView(web.View):
         if not note:
             return web.json_response(reason="Note not found", status=404)
 
-        return web.json_response(text=note.json())
+        return note
 
     async def patch(self) -> models.Note:
         new_fields = await self.request.json()
@@ -90,9 +89,7 @@ class NotesView(web.View):
             )
 
         notes = list(models.database.values())
-        return web.json_response(
-            [json.loads(note.json()) for note in notes[offset : offset + limit]]
-        )
+        return notes[offset : offset + limit]
 
 
 class HelloView:
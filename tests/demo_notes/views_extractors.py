@@ -1,5 +1,4 @@
 import datetime
-import json
 import os
 import typing as t
 import uuid
@@ -8,6 +7,7 @@ from pathlib import Path
 import pydantic
 from aiohttp import web
 
+from aiohttp_openapi import make_response
 from aiohttp_openapi.parser.decorators import openapi_view
 from aiohttp_openapi.parser.extractors import (
     FileUpload,
@@ -39,7 +39,7 @@ async def create_note(body=Json(models.CreateNote)) -> models.Note:
         )
 
     models.database[note.id] = note
-    return web.json_response(text=note.json(), status=201)
+    return note
 
 
 @openapi_view(response_description="Note's detail.", tag="Notes")
@@ -48,7 +48,7 @@ async def get_note(id=Param(uuid.UUID)) -> models.Note:
     note = models.database.get(id)
     if not note:
         return web.json_response(reason="Note not found", status=404)
-    return web.json_response(text=note.json())
+    return note
 
 
 @openapi_view(response_description="Update note with fields from object.", tag="Notes")
@@ -66,11 +66,12 @@ async def patch_note(
     patched_note = models.Note(**patched_fields)
     models.database[patched_note.id] = patched_note
 
-    return web.json_response(text=patched_note.json())
+    return patched_note
 
 
 @openapi_view(response_description="List of notes.", tag="Notes")
 async def list_notes(
+    request,
     offset=Param(int, minimum=0, example=10),
     limit=Param(
         25,
@@ -91,8 +92,9 @@ async def list_notes(
 ) -> t.List[models.Note]:
     """List notes."""
     notes = list(models.database.values())
-    return web.json_response(
-        [json.loads(note.json()) for note in notes[offset : offset + limit]],
+    return make_response(
+        request,
+        notes[offset : offset + limit],
         headers={"author-type": author_type.value if author_type else "None"},
     )
 
@@ -108,7 +110,7 @@ async def set_biography(name: str, biography=Text()) -> models.Author:
     author = models.database[name]
     author.biography = biography
     models.database[author.name] = author
-    return web.json_response(text=author.json())
+    return author
 
 
 @openapi_view(tag="Authors")
@@ -123,7 +125,7 @@ async def set_avatar(name: str, avatar=FileUploadReader()) -> models.Author:
     author.avatar = str(path.relative_to(upload_dir))
 
     models.database[author.name] = author
-    return web.json_response(text=author.json())
+    return author
 
 
 @openapi_view(
@@ -142,7 +144,7 @@ async def add_author(
     author.avatar = path
 
     models.database[author.name] = author
-    return web.json_response(text=author.json())
+    return author
 
 
 @openapi_view(tag="Authors")
@@ -166,7 +168,7 @@ async def set_author(
     )
 
     models.database[author.name] = author
-    return web.json_response(text=author.json())
+    return author
 
 
 @openapi_view(tag="Authors")
@@ -204,7 +206,7 @@ async def set_author_streamed(
     )
 
     models.database[author.name] = author
-    return web.json_response(text=author.json())
+    return author
 
 
 def setup_routes(app):
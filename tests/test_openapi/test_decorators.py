@@ -1,18 +1,58 @@
+import array
+import asyncio
 import datetime
+import enum
+import gzip
+import hashlib
 import json
 import logging
+import multiprocessing
 import sys
+import typing as t
 import uuid
+import zlib
 from typing import List, Optional
 
+import aiohttp
 import pytest
 from aiohttp import web
 from pydantic import BaseModel
 
-from aiohttp_openapi import exceptions
+from aiohttp_openapi import (
+    CompressionPolicy,
+    TTLCache,
+    cache,
+    compression,
+    configure,
+    exceptions,
+    make_response,
+    register_parser,
+    responses,
+    sinks,
+)
+from aiohttp_openapi.cache import CacheStats
+from aiohttp_openapi.openapi.schema import make_schema
+from aiohttp_openapi.parser import codegen, extractors, func_inspector
 from aiohttp_openapi.parser.decorators import openapi_view
-from aiohttp_openapi.parser.extractors import Extractor, Json, Param, Text
+from aiohttp_openapi.parser.extractors import (
+    Cookie,
+    Extractor,
+    FileUploadReader,
+    FileUploadTee,
+    Header,
+    Json,
+    JsonStream,
+    MsgPack,
+    MultiPart,
+    MultiPartReader,
+    MultipleFileUpload,
+    Negotiated,
+    Param,
+    SpooledFile,
+    Text,
+)
 from aiohttp_openapi.parser.func_inspector import make_extractors_for_handler
+from aiohttp_openapi.shared_cache import SharedMemoryCache
 
 
 async def get_json(resp, expected_status=200):
@@ -329,3 +369,2023 @@ async def test_extract_request(view, make_client):
 
 
 logger = logging.getLogger(__name__)
+
+
+async def test_extraction_plan_is_built_once(monkeypatch, aiohttp_client):
+    @openapi_view
+    async def plan_view(note_id=Param(int), limit=Param(10)):
+        return web.json_response({"note_id": note_id, "limit": limit})
+
+    calls = []
+    make_plan = func_inspector.make_extraction_plan
+
+    def counting_make_plan(*args, **kwargs):
+        calls.append(args)
+        return make_plan(*args, **kwargs)
+
+    monkeypatch.setattr(func_inspector, "make_extraction_plan", counting_make_plan)
+    app = web.Application()
+    app.router.add_get("/plan/{note_id}", plan_view)
+    client = await aiohttp_client(app)
+    for i in range(3):
+        resp = await client.get(f"/plan/{i}?limit=5")
+        assert await get_json(resp) == {"note_id": i, "limit": 5}
+    assert len(calls) == 1
+
+
+def test_extraction_plan_separates_sync_extractors():
+    plan = func_inspector.make_extraction_plan(int_view, set())
+    assert [name for name, _ in plan.sync_extractors] == ["note_id"]
+    assert [name for name, _ in plan.async_extractors] == ["note"]
+
+
+async def query_and_path_view(
+    request, note_id=Param(int), limit=Param(25), sort=Param(str, name="Sort")
+):
+    return web.json_response({"note_id": note_id, "limit": limit, "sort": sort})
+
+
+@pytest.fixture(params=[False, True], ids=["generic", "compiled"])
+async def parser_client(request, aiohttp_client):
+    view = openapi_view(compile_parser=request.param)(query_and_path_view)
+    app = web.Application()
+    app.router.add_get("/notes/{note_id}", view)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.parametrize(
+    "url_status_data",
+    [
+        ("/notes/1?sort=a", 200, {"note_id": 1, "limit": 25, "sort": "a"}),
+        ("/notes/2?LIMIT=3&SORT=b", 200, {"note_id": 2, "limit": 3, "sort": "b"}),
+        ("/notes/x?sort=a", 400, [{"in": "path", "loc": ["note_id"]}]),
+        ("/notes/1?sort=a&limit=y", 400, [{"in": "query", "loc": ["limit"]}]),
+        ("/notes/1", 400, [{"in": "query", "loc": ["Sort"]}]),
+    ],
+)
+async def test_compiled_parser(parser_client, url_status_data):
+    url, status, expected = url_status_data
+    resp = await parser_client.get(url)
+    assert resp.status == status
+    data = await resp.json()
+    if status == 200:
+        assert data == expected
+    else:
+        assert [{k: e[k] for k in ("in", "loc")} for e in data] == expected
+
+
+def test_compiled_parser_source():
+    plan = func_inspector.make_extraction_plan(query_and_path_view, {"note_id"})
+    parse_request = codegen.make_sync_parser(plan)
+    assert "for " not in parse_request.__source__
+    assert "extract_" not in parse_request.__source__
+
+
+@pytest.mark.parametrize("compile_parser", [False, True])
+async def test_case_sensitive_query(aiohttp_client, compile_parser):
+    view = openapi_view(case_sensitive_query=True, compile_parser=compile_parser)(
+        query_and_path_view
+    )
+    app = web.Application()
+    app.router.add_get("/notes/{note_id}", view)
+    client = await aiohttp_client(app)
+    resp = await client.get("/notes/1?Sort=a&LIMIT=3")
+    assert await get_json(resp) == {"note_id": 1, "limit": 25, "sort": "a"}
+    resp = await client.get("/notes/1?sort=a")
+    assert resp.status == 400
+
+
+async def header_cookie_view(
+    token=Header(str, name="X-Token"),
+    trace_id=Cookie(str, name="trace"),
+    retries=Header(int, 0),
+    session=Cookie(str, None),
+):
+    return web.json_response(
+        {"token": token, "trace_id": trace_id, "retries": retries, "session": session}
+    )
+
+
+@pytest.mark.parametrize("compile_parser", [False, True])
+async def test_header_and_cookie(aiohttp_client, compile_parser):
+    view = openapi_view(compile_parser=compile_parser)(header_cookie_view)
+    app = web.Application()
+    app.router.add_get("/", view)
+    client = await aiohttp_client(app)
+
+    headers = {"x-token": "secret", "Retries": "3", "Cookie": "trace=abc; other=1"}
+    resp = await client.get("/", headers=headers)
+    assert await get_json(resp) == {
+        "token": "secret",
+        "trace_id": "abc",
+        "retries": 3,
+        "session": None,
+    }
+
+    resp = await client.get("/", headers={"Cookie": "trace=abc"})
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["in"] == "header"
+    assert err_dict["loc"] == ["X-Token"]
+    assert err_dict["type"] == "MissingValueError"
+
+    headers = {"X-Token": "secret", "retries": "many", "Cookie": "trace=abc"}
+    resp = await client.get("/", headers=headers)
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["in"] == "header"
+    assert err_dict["loc"] == ["retries"]
+    assert err_dict["type"] == "ValueError"
+
+
+async def test_shared_header_extractor(aiohttp_client):
+    optional_header = Header(str, "-")
+
+    @openapi_view
+    async def a_view(x_a=optional_header):
+        return web.json_response({"x_a": x_a})
+
+    @openapi_view
+    async def b_view(x_b=optional_header):
+        return web.json_response({"x_b": x_b})
+
+    app = web.Application()
+    app.router.add_get("/a", a_view)
+    app.router.add_get("/b", b_view)
+    client = await aiohttp_client(app)
+    headers = {"x_a": "A", "x_b": "B"}
+    assert await get_json(await client.get("/a", headers=headers)) == {"x_a": "A"}
+    assert await get_json(await client.get("/b", headers=headers)) == {"x_b": "B"}
+    assert await get_json(await client.get("/a", headers=headers)) == {"x_a": "A"}
+
+
+def test_header_and_cookie_schema():
+    app = web.Application()
+    app.router.add_get("/", openapi_view(header_cookie_view))
+    schema = make_schema(app, title="Headers", version="0.0.1").dict()
+    parameters = schema["paths"]["/"]["get"]["parameters"]
+    assert [(p["name"], p["in"]) for p in parameters] == [
+        ("X-Token", "header"),
+        ("trace", "cookie"),
+        ("retries", "header"),
+        ("session", "cookie"),
+    ]
+
+
+class Color(enum.IntEnum):
+    red = 1
+    green = 2
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def parse_point(raw_value):
+    x, y = raw_value.split(",")
+    return Point(float(x), float(y))
+
+
+register_parser(Point, parse_point, schema_type="string", schema_format="point")
+
+
+@openapi_view
+async def typed_view(
+    flag=Param(bool),
+    color=Param(Color),
+    since=Param(datetime.datetime),
+    point=Param(Point),
+):
+    return web.json_response(
+        {
+            "flag": flag,
+            "color": color.name,
+            "since": since.isoformat(),
+            "point": [point.x, point.y],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "query_data",
+    [
+        (
+            "?flag=false&color=2&since=2021-01-02T03:04:05&point=1,2",
+            {
+                "flag": False,
+                "color": "green",
+                "since": "2021-01-02T03:04:05",
+                "point": [1.0, 2.0],
+            },
+        ),
+        (
+            "?flag=YES&color=1&since=2021-01-02&point=0,0.5",
+            {
+                "flag": True,
+                "color": "red",
+                "since": "2021-01-02T00:00:00",
+                "point": [0.0, 0.5],
+            },
+        ),
+    ],
+)
+async def test_registered_parsers(aiohttp_client, query_data):
+    query, expected = query_data
+    app = web.Application()
+    app.router.add_get("/", typed_view)
+    client = await aiohttp_client(app)
+    resp = await client.get("/" + query)
+    assert await get_json(resp) == expected
+
+
+@pytest.mark.parametrize(
+    "param_value", [("flag", "nope"), ("color", "3"), ("since", "yesterday")]
+)
+async def test_registered_parsers_wrong_value(aiohttp_client, param_value):
+    query = {"flag": "1", "color": "1", "since": "2021-01-01", "point": "1,1"}
+    param, value = param_value
+    query[param] = value
+    app = web.Application()
+    app.router.add_get("/", typed_view)
+    client = await aiohttp_client(app)
+    resp = await client.get("/", params=query)
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["loc"] == [param]
+    assert err_dict["type"] == "ValueError"
+
+
+def test_registered_parser_schema():
+    app = web.Application()
+    app.router.add_get("/", typed_view)
+    schema = make_schema(app, title="Parsers", version="0.0.1").dict()
+    parameters = schema["paths"]["/"]["get"]["parameters"]
+    assert [p["schema"] for p in parameters] == [
+        {"type": "boolean"},
+        {"type": "integer", "enum": ["1", "2"]},
+        {"type": "string", "format": "date-time"},
+        {"type": "string", "format": "point"},
+    ]
+
+
+async def test_param_cache(aiohttp_client):
+    note_id_param = Param(uuid.UUID, cache=2)
+
+    @openapi_view
+    async def cached_view(note_id=note_id_param):
+        return web.json_response({"note_id": str(note_id)})
+
+    app = web.Application()
+    app.router.add_get("/notes/{note_id}", cached_view)
+    client = await aiohttp_client(app)
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    for note_id in [ids[0], ids[0], ids[1], ids[0], ids[2], ids[1]]:
+        resp = await client.get(f"/notes/{note_id}")
+        assert await get_json(resp) == {"note_id": note_id}
+    resp = await client.get("/notes/not-uuid")
+    assert resp.status == 400
+
+    cache_info = note_id_param.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (2, 5)
+    assert cache_info.currsize == 2
+
+
+def test_param_cache_requires_pure_parser():
+    assert Param(int).cache_info() is None
+    with pytest.raises(exceptions.UnacceptableSignature):
+        Param(lambda raw: [raw], cache=10)
+    with pytest.raises(exceptions.UnacceptableSignature):
+        Param(int, cache=lambda raw: raw)
+
+
+async def array_view(
+    ids=Param(t.List[int]),
+    colors=Param(t.List[Color], [], style="form", explode=False),
+    weights=Param(t.List[float], None, as_array=True),
+    tags=Param(t.List[str], [], style="pipeDelimited", explode=False),
+):
+    assert weights is None or isinstance(weights, array.array)
+    return web.json_response(
+        {
+            "ids": ids,
+            "colors": [c.name for c in colors],
+            "weights": weights and list(weights),
+            "tags": tags,
+        }
+    )
+
+
+@pytest.mark.parametrize("compile_parser", [False, True])
+async def test_array_params(aiohttp_client, compile_parser):
+    app = web.Application()
+    app.router.add_get("/", openapi_view(compile_parser=compile_parser)(array_view))
+    client = await aiohttp_client(app)
+
+    query = "?ids=1&IDS=2&ids=3&colors=1,2&weights=0.5&weights=1&tags=a|b"
+    resp = await client.get("/" + query)
+    assert await get_json(resp) == {
+        "ids": [1, 2, 3],
+        "colors": ["red", "green"],
+        "weights": [0.5, 1.0],
+        "tags": ["a", "b"],
+    }
+
+    resp = await client.get("/?ids=1&ids=x")
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["loc"] == ["ids"]
+    assert err_dict["type"] == "ValueError"
+
+
+def test_array_params_schema():
+    app = web.Application()
+    app.router.add_get("/", openapi_view(array_view))
+    schema = make_schema(app, title="Arrays", version="0.0.1").dict()
+    parameters = {p["name"]: p for p in schema["paths"]["/"]["get"]["parameters"]}
+    assert parameters["ids"] == {
+        "name": "ids",
+        "in": "query",
+        "required": True,
+        "style": "form",
+        "explode": True,
+        "schema": {"type": "array", "items": {"type": "integer"}},
+    }
+    assert parameters["colors"]["explode"] is False
+    assert parameters["colors"]["schema"]["items"]["enum"] == ["1", "2"]
+    assert parameters["tags"]["style"] == "pipeDelimited"
+
+
+@pytest.mark.parametrize("loads_level", ["app", "extractor"])
+async def test_json_loads(aiohttp_client, loads_level):
+    decoded = []
+
+    def loads(body):
+        assert isinstance(body, bytes)
+        decoded.append(body)
+        return json.loads(body)
+
+    extractor = Json(dict, loads=loads) if loads_level == "extractor" else Json(dict)
+
+    @openapi_view
+    async def json_view(data=extractor):
+        return web.json_response(data)
+
+    app = web.Application()
+    if loads_level == "app":
+        configure(app, json_loads=loads)
+    app.router.add_post("/", json_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", json={"a": 1})
+    assert await get_json(resp) == {"a": 1}
+    assert decoded == [b'{"a": 1}']
+
+
+async def test_json_loads_by_name(aiohttp_client):
+    pytest.importorskip("orjson")
+
+    @openapi_view
+    async def json_view(note=Json(Note, loads="orjson")):
+        return web.json_response(text=note.json())
+
+    app = web.Application()
+    app.router.add_post("/", json_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", data=b"{not json")
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["loc"] == ["__root__"]
+    assert err_dict["type"] == "JSONDecodeError"
+
+
+def test_unknown_json_loads():
+    with pytest.raises(ValueError):
+        configure(web.Application(), json_loads="simplejson2")
+
+
+async def test_json_from_raw(aiohttp_client):
+    @openapi_view
+    async def raw_view(note=Json(Note, from_raw=True)):
+        return web.json_response(text=note.json())
+
+    app = web.Application()
+    app.router.add_post("/", raw_view)
+    client = await aiohttp_client(app)
+    note = Note(
+        id=uuid.uuid4(), title="raw", owner_id=1, created=datetime.datetime.now()
+    )
+    resp = await client.post("/", data=note.json())
+    assert Note.parse_raw(await resp.read()) == note
+
+    resp = await client.post("/", json={"title": "raw"})
+    errors = await get_json(resp, 400)
+    assert {e["in"] for e in errors} == {"body (json)"}
+    assert {e["loc"][0] for e in errors} == {"id", "owner_id", "created"}
+
+    resp = await client.post("/", data=b"{")
+    err_dict = (await get_json(resp, 400))[0]
+    assert err_dict["loc"] == ["__root__"]
+    assert err_dict["type"] == "JSONDecodeError"
+
+
+def test_json_from_raw_requires_model():
+    with pytest.raises(exceptions.UnacceptableSignature):
+        Json(dict, from_raw=True)
+
+
+PYDANTIC_V2 = hasattr(BaseModel, "model_validate_json")
+
+
+@pytest.mark.skipif(PYDANTIC_V2, reason="pydantic v2 decodes body itself")
+async def test_json_from_raw_loads(aiohttp_client):
+    decoded = []
+
+    def loads(body):
+        decoded.append(body)
+        return json.loads(body)
+
+    @openapi_view
+    async def raw_view(note=Json(Note, from_raw=True)):
+        return web.json_response(text=note.json())
+
+    @openapi_view
+    async def orjson_view(note=Json(Note, from_raw=True, loads="orjson")):
+        return web.json_response(text=note.json())
+
+    app = web.Application()
+    configure(app, json_loads=loads)
+    app.router.add_post("/", raw_view)
+    app.router.add_post("/orjson", orjson_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", data=NOTE.json())
+    assert Note.parse_raw(await resp.read()) == NOTE
+    assert decoded == [NOTE.json().encode()]
+
+    pytest.importorskip("orjson")
+    resp = await client.post("/orjson", data=NOTE.json())
+    assert Note.parse_raw(await resp.read()) == NOTE
+    assert len(decoded) == 1
+
+
+@pytest.mark.skipif(not PYDANTIC_V2, reason="model_validate_json of pydantic v2")
+async def test_json_from_raw_errors_v2(aiohttp_client):
+    @openapi_view
+    async def raw_view(note=Json(Note, from_raw=True)):
+        return web.json_response(text=note.model_dump_json())
+
+    app = web.Application()
+    app.router.add_post("/", raw_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", data=NOTE.model_dump_json())
+    assert Note.model_validate_json(await resp.read()) == NOTE
+
+    resp = await client.post("/", json={"title": "raw"})
+    errors = await get_json(resp, 400)
+    assert {e["loc"][0] for e in errors} == {"id", "owner_id", "created"}
+    assert all(set(e) == {"in", "loc", "msg", "type"} for e in errors)
+
+    resp = await client.post("/", data=b"{")
+    errors = await get_json(resp, 400)
+    assert [(e["in"], e["loc"]) for e in errors] == [("body (json)", ["__root__"])]
+    with pytest.raises(exceptions.UnacceptableSignature):
+        Json(Note, from_raw=True, loads="stdlib")
+
+
+def test_pydantic_errors_normalized():
+    v2_error = {
+        "type": "greater_than",
+        "loc": ("owner_id",),
+        "msg": "Input should be greater than 0",
+        "input": -1,
+        "ctx": {"gt": 0, "error": ValueError("negative")},
+        "url": "https://errors.pydantic.dev/2.5/v/greater_than",
+    }
+    assert exceptions._normalize_error(v2_error) == {
+        "type": "greater_than",
+        "loc": ("owner_id",),
+        "msg": "Input should be greater than 0",
+        "ctx": {"gt": 0, "error": "negative"},
+    }
+
+
+@pytest.fixture
+async def limits_client(aiohttp_client):
+    @openapi_view
+    async def json_view(data=Json(dict, max_bytes=100, max_depth=3, max_items=4)):
+        return web.json_response(data)
+
+    @openapi_view
+    async def text_view(text=Text()):
+        return web.json_response({"length": len(text)})
+
+    @openapi_view
+    async def form_view(
+        form=MultipleFileUpload(dict, max_bytes=1000, max_part_bytes=10)
+    ):
+        return web.json_response(sorted(form))
+
+    app = web.Application()
+    configure(app, max_body_bytes=50)
+    app.router.add_post("/json", json_view)
+    app.router.add_post("/text", text_view)
+    app.router.add_post("/form", form_view)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.parametrize(
+    "url_data_status",
+    [
+        ("/json", {"a": [1, {"b": ["[[[[,,,,"]}]}, 200),
+        ("/json", {"a": "x" * 100}, 413),
+        ("/json", {"a": [[[1]]]}, 400),
+        ("/json", {"a": [1, 2, 3, 4, 5]}, 400),
+        ("/text", "x" * 50, 200),
+        ("/text", "x" * 51, 413),
+    ],
+)
+async def test_body_limits(limits_client, url_data_status):
+    url, data, status = url_data_status
+    if isinstance(data, str):
+        resp = await limits_client.post(url, data=data)
+    else:
+        resp = await limits_client.post(url, json=data)
+    if status == 200:
+        await get_json(resp)
+        return
+    err_dict = (await get_json(resp, status))[0]
+    assert err_dict["loc"] == ["__root__"]
+    expected_type = "PayloadTooLargeError" if status == 413 else "LimitExceededError"
+    assert err_dict["type"] == expected_type
+
+
+async def test_body_limit_without_content_length(limits_client):
+    async def gen_body():
+        for _ in range(10):
+            yield b"x" * 10
+
+    resp = await limits_client.post("/text", data=gen_body())
+    err_dict = (await get_json(resp, 413))[0]
+    assert err_dict["msg"] == "Body is larger than 50 bytes"
+
+
+async def test_multipart_part_limit(limits_client):
+    form = aiohttp.FormData()
+    form.add_field("small", "x" * 10, content_type="text/plain")
+    form.add_field("big", "x" * 11, content_type="text/plain")
+    resp = await limits_client.post("/form", data=form)
+    err_dict = (await get_json(resp, 413))[0]
+    assert err_dict["loc"] == ["big"]
+    assert err_dict["in"] == "body (multipart)"
+
+
+async def test_multipart_total_limit(aiohttp_client, monkeypatch):
+    part_limits = []
+    read_body = extractors._read_body
+
+    async def record_limit(source, max_bytes, *args):
+        part_limits.append(max_bytes)
+        return await read_body(source, max_bytes, *args)
+
+    monkeypatch.setattr(extractors, "_read_body", record_limit)
+
+    @openapi_view
+    async def upload_view(form=MultipleFileUpload(dict, max_bytes=100)):
+        return web.json_response(sorted(form))
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    client = await aiohttp_client(app)
+    form = aiohttp.FormData()
+    form.add_field("small", "x" * 60, content_type="text/plain")
+    form.add_field("big", b"x" * 60, content_type="text/plain")
+    payload = form()
+    body = await payload.as_bytes()
+
+    async def gen_body():  # without Content-Length
+        yield body
+
+    headers = {"Content-Type": payload.content_type}
+    resp = await client.post("/", data=gen_body(), headers=headers)
+    errors = await get_json(resp, 413)
+    assert [(e["loc"], e["msg"]) for e in errors] == [
+        (["__root__"], "Body is larger than 100 bytes")
+    ]
+    # Part is read not further than the rest of limit of body
+    assert part_limits == [100, 40]
+
+
+async def test_body_read_by_middleware(aiohttp_client):
+    @web.middleware
+    async def read_body(request, handler):
+        await request.read()
+        return await handler(request)
+
+    @openapi_view
+    async def json_view(data=Json(dict)):
+        return web.json_response(data)
+
+    app = web.Application(middlewares=[read_body])
+    configure(app, max_body_bytes=10_000)
+    app.router.add_post("/", json_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", json={"a": 1})
+    assert await get_json(resp) == {"a": 1}
+    resp = await client.post("/", json={"a": "x" * 10_000})
+    await get_json(resp, 413)
+
+
+class Record(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+async def stream_client(aiohttp_client):
+    @openapi_view
+    async def records_view(records=JsonStream(Record)):
+        return web.json_response([record.id async for record in records])
+
+    @openapi_view
+    async def batches_view(batches=JsonStream(Record, batch_size=2)):
+        return web.json_response([len(batch) async for batch in batches])
+
+    @openapi_view
+    async def limited_view(records=JsonStream(int, max_bytes=20)):
+        return web.json_response([record async for record in records])
+
+    app = web.Application()
+    app.router.add_post("/records", records_view)
+    app.router.add_post("/batches", batches_view)
+    app.router.add_post("/limited", limited_view)
+    return await aiohttp_client(app)
+
+
+def _ndjson(*lines):
+    return "\n".join(json.dumps(line) for line in lines) + "\n"
+
+
+async def test_json_stream_ndjson(stream_client):
+    body = _ndjson(*({"id": i, "name": str(i)} for i in range(5)))
+    headers = {"Content-Type": "application/x-ndjson"}
+    resp = await stream_client.post("/records", data=body, headers=headers)
+    assert await get_json(resp) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ("[]", []),
+        (' [ {"id": 1, "name": "a,]}\\"["} , {"id": 2, "name": "b"}] ', [1, 2]),
+        (
+            json.dumps([{"id": i, "name": "x" * i} for i in range(100)]),
+            list(range(100)),
+        ),
+    ],
+)
+async def test_json_stream_array(stream_client, body, expected):
+    headers = {"Content-Type": "application/json"}
+    resp = await stream_client.post("/records", data=body, headers=headers)
+    assert await get_json(resp) == expected
+
+
+async def test_json_stream_array_in_chunks(stream_client):
+    body = json.dumps([{"id": i, "name": '"[\\' * i} for i in range(20)]).encode()
+
+    async def gen_chunks():
+        for i in range(0, len(body), 7):
+            yield body[i : i + 7]
+
+    headers = {"Content-Type": "application/json"}
+    resp = await stream_client.post("/records", data=gen_chunks(), headers=headers)
+    assert await get_json(resp) == list(range(20))
+
+
+async def test_json_stream_batches(stream_client):
+    body = _ndjson(*({"id": i, "name": str(i)} for i in range(5)))
+    headers = {"Content-Type": "application/x-ndjson"}
+    resp = await stream_client.post("/batches", data=body, headers=headers)
+    assert await get_json(resp) == [2, 2, 1]
+
+
+async def test_json_stream_item_errors(stream_client):
+    body = _ndjson({"id": 1, "name": "a"}, {"id": "x", "name": "b"})
+    headers = {"Content-Type": "application/x-ndjson"}
+    resp = await stream_client.post("/records", data=body, headers=headers)
+    assert await get_json(resp, 400) == [
+        {
+            "in": "body (json)",
+            "loc": [1, "id"],
+            "msg": "value is not a valid integer",
+            "type": "type_error.integer",
+        }
+    ]
+
+    resp = await stream_client.post("/records", data='[{"id": 1, "name": "a"},]')
+    errors = await get_json(resp, 400)
+    assert [(e["loc"], e["type"]) for e in errors] == [([1], "JSONDecodeError")]
+
+
+@pytest.mark.parametrize("body", ['{"id": 1}', "[1, 2", "[1] 2"])
+async def test_json_stream_not_array(stream_client, body):
+    resp = await stream_client.post("/limited", data=body)
+    errors = await get_json(resp, 400)
+    assert [(e["loc"], e["type"]) for e in errors] == [(["__root__"], "ValueError")]
+
+
+async def test_json_stream_max_bytes(stream_client):
+    async def gen_chunks():
+        for i in range(100):
+            yield f"{i}\n".encode()
+
+    headers = {"Content-Type": "application/x-ndjson"}
+    resp = await stream_client.post("/limited", data=gen_chunks(), headers=headers)
+    errors = await get_json(resp, 413)
+    assert errors[0]["type"] == "PayloadTooLargeError"
+
+
+def test_json_stream_schema():
+    @openapi_view
+    async def stream_view(records=JsonStream(Record)):
+        pass
+
+    app = web.Application()
+    app.router.add_post("/", stream_view)
+    schema = make_schema(app, title="Stream", version="0.0.1").dict()
+    content = schema["paths"]["/"]["post"]["requestBody"]["content"]
+    expected = {
+        "schema": {
+            "type": "array",
+            "items": {"$ref": "#/components/schemas/Record"},
+        }
+    }
+    assert content == {"application/x-ndjson": expected, "application/json": expected}
+
+
+class Upload(BaseModel):
+    title: str
+    data: SpooledFile
+
+
+async def test_multipart_spooling(aiohttp_client):
+    files = []
+
+    @openapi_view
+    async def upload_view(upload=MultipleFileUpload(Upload, spool_threshold=1000)):
+        files.append(upload.data)
+        assert upload.data.filename == "data.bin"
+        return web.json_response(
+            {
+                "title": upload.title,
+                "size": upload.data.size,
+                "rolled": upload.data._rolled,
+                "head": upload.data.read(4).decode(),
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    client = await aiohttp_client(app)
+    for size, rolled in ((10, False), (200_000, True)):
+        form = aiohttp.FormData()
+        form.add_field("title", "spooled", content_type="text/plain")
+        form.add_field("data", b"abcd" * size, filename="data.bin")
+        resp = await client.post("/", data=form)
+        assert await get_json(resp) == {
+            "title": "spooled",
+            "size": size * 4,
+            "rolled": rolled,
+            "head": "abcd",
+        }
+    assert len(files) == 2
+    assert all(file.closed for file in files)
+
+
+async def test_multipart_spooling_limits(aiohttp_client):
+    @openapi_view
+    async def upload_view(form=MultipleFileUpload(dict, max_part_bytes=100)):
+        return web.json_response(sorted(form))
+
+    app = web.Application()
+    configure(app, spool_threshold=10)
+    app.router.add_post("/", upload_view)
+    client = await aiohttp_client(app)
+    form = aiohttp.FormData()
+    form.add_field("data", b"0" * 101, filename="data.bin")
+    resp = await client.post("/", data=form)
+    errors = await get_json(resp, 413)
+    assert [(e["loc"], e["type"]) for e in errors] == [
+        (["data"], "PayloadTooLargeError")
+    ]
+
+
+async def test_multipart_values(aiohttp_client):
+    extractor = MultiPart(title=Text(), author=Json(dict), signature=Text("-"))
+    result_types = set()
+
+    @openapi_view
+    async def multipart_view(values=extractor):
+        result_types.add(type(values))
+        return web.json_response(values._asdict())
+
+    app = web.Application()
+    app.router.add_post("/", multipart_view)
+    client = await aiohttp_client(app)
+
+    def make_form(**fields):
+        form = aiohttp.FormData()
+        for name, (value, content_type) in fields.items():
+            form.add_field(name, value, content_type=content_type)
+        return form
+
+    form = make_form(
+        author=('{"name": "Jane"}', "application/json"),
+        title=("Notes", "text/plain"),
+        unknown=("skipped", "text/plain"),
+    )
+    resp = await client.post("/", data=form)
+    assert await get_json(resp) == {
+        "title": "Notes",
+        "author": {"name": "Jane"},
+        "signature": "-",
+    }
+    resp = await client.post("/", data=make_form(title=("Notes", "text/plain")))
+    assert await get_json(resp, 400) == [
+        {
+            "in": "body (multipart)",
+            "loc": ["author"],
+            "msg": 'Parameter "author" is required in body (multipart)',
+            "type": "MissingValueError",
+        }
+    ]
+    assert result_types == {extractor._values_type}
+
+
+async def test_multipart_parts_settings(aiohttp_client):
+    loaded = []
+
+    def loads(body):
+        loaded.append(body)
+        return json.loads(body)
+
+    @openapi_view
+    async def multipart_view(values=MultiPart(title=Text(), author=Json(dict))):
+        return web.json_response(values._asdict())
+
+    app = web.Application()
+    configure(app, json_loads=loads, max_part_bytes=20)
+    app.router.add_post("/", multipart_view)
+    client = await aiohttp_client(app)
+    form = aiohttp.FormData()
+    form.add_field("title", "Notes", content_type="text/plain")
+    form.add_field("author", '{"name": "Jane"}', content_type="application/json")
+    resp = await client.post("/", data=form)
+    assert await get_json(resp) == {"title": "Notes", "author": {"name": "Jane"}}
+    assert loaded == [b'{"name": "Jane"}']
+
+    form = aiohttp.FormData()
+    form.add_field("title", "x" * 21, content_type="text/plain")
+    resp = await client.post("/", data=form)
+    errors = await get_json(resp, 413)
+    assert errors[0]["msg"] == "Body is larger than 20 bytes"
+
+
+async def test_multipart_reader_limit(aiohttp_client):
+    @openapi_view
+    async def multipart_view(values=MultiPart(max_bytes=1000, title=Text())):
+        return web.json_response(values._asdict())
+
+    @openapi_view
+    async def reader_view(parts=MultiPartReader(max_bytes=1000, title=Text())):
+        return web.json_response([await part.text() async for part, _ in parts])
+
+    app = web.Application()
+    app.router.add_post("/values", multipart_view)
+    app.router.add_post("/parts", reader_view)
+    client = await aiohttp_client(app)
+
+    def make_body(size):
+        form = aiohttp.FormData()
+        form.add_field("title", "Notes", content_type="text/plain")
+        form.add_field("unknown", "x" * size, content_type="text/plain")
+        payload = form()
+
+        async def gen_body():  # without Content-Length
+            yield await payload.as_bytes()
+
+        return gen_body(), {"Content-Type": payload.content_type}
+
+    for url in ("/values", "/parts"):
+        body, headers = make_body(100)
+        resp = await client.post(url, data=body, headers=headers)
+        await get_json(resp)
+        body, headers = make_body(1000)
+        resp = await client.post(url, data=body, headers=headers)
+        errors = await get_json(resp, 413)
+        assert errors[0]["msg"] == "Body is larger than 1000 bytes"
+
+
+async def test_file_upload_reader_limit(aiohttp_client):
+    @openapi_view
+    async def upload_view(stream=FileUploadReader(max_bytes=100)):
+        return web.json_response({"size": len(await stream.read())})
+
+    @openapi_view
+    async def chunks_view(stream=FileUploadReader(max_bytes=100)):
+        return web.json_response(
+            {"size": sum([len(c) async for c in stream.iter_any()])}
+        )
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    app.router.add_post("/chunks", chunks_view)
+    client = await aiohttp_client(app)
+
+    def gen_body(size):  # without Content-Length
+        async def gen():
+            for _ in range(size // 10):
+                yield b"x" * 10
+
+        return gen()
+
+    for url in ("/", "/chunks"):
+        resp = await client.post(url, data=gen_body(100))
+        assert await get_json(resp) == {"size": 100}
+        resp = await client.post(url, data=gen_body(110))
+        errors = await get_json(resp, 413)
+        assert errors[0]["msg"] == "Body is larger than 100 bytes"
+
+
+async def test_file_upload_tee(aiohttp_client, tmp_path):
+    scanned = []
+
+    async def scan(chunk):
+        await asyncio.sleep(0)  # slow sink
+        scanned.append(len(chunk))
+
+    tee = FileUploadTee(
+        sinks=[
+            sinks.DiskSink(tmp_path),
+            sinks.HashSink(),
+            sinks.SizeSink(),
+            sinks.CallbackSink(scan, lambda: len(scanned), name="chunks"),
+        ]
+    )
+
+    @openapi_view
+    async def upload_view(upload=tee):
+        return web.json_response(
+            {
+                "content": upload.path.read_bytes().decode(),
+                "sha256": upload.sha256,
+                "size": upload.size,
+                "chunks": upload.chunks,
+            }
+        )
+
+    @openapi_view
+    async def multipart_view(form=MultiPart(title=Text(), data=tee)):
+        return web.json_response({"title": form.title, "size": form.data.size})
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    app.router.add_post("/multipart", multipart_view)
+    client = await aiohttp_client(app)
+
+    body = b"0123456789" * 100_000
+
+    async def gen_chunks():
+        for i in range(0, len(body), 1000):
+            yield body[i : i + 1000]
+
+    resp = await client.post("/", data=gen_chunks())
+    result = await get_json(resp)
+    assert result["content"] == body.decode()
+    assert result["sha256"] == hashlib.sha256(body).hexdigest()
+    assert result["size"] == len(body)
+    assert result["chunks"] == len(scanned) > 0
+
+    form = aiohttp.FormData()
+    form.add_field("title", "tee", content_type="text/plain")
+    form.add_field("data", body, filename="data.bin")
+    resp = await client.post("/multipart", data=form)
+    assert await get_json(resp) == {"title": "tee", "size": len(body)}
+
+
+async def test_file_upload_tee_failed_sink(aiohttp_client, tmp_path):
+    async def fail(chunk):
+        raise ValueError("Infected")
+
+    @openapi_view
+    async def upload_view(
+        upload=FileUploadTee(
+            sinks=[sinks.DiskSink(tmp_path), sinks.CallbackSink(fail, name="scan")]
+        )
+    ):
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", data=b"x" * 1_000_000)
+    assert resp.status == 500
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_file_upload_tee_sink_fails_after_disk_sink(aiohttp_client, tmp_path):
+    class FailingSink(sinks.Sink):
+        name = "scan"
+
+        async def consume(self, chunks):
+            async for _ in chunks:
+                pass
+            await asyncio.sleep(0.1)  # DiskSink finishes meanwhile
+            raise ValueError("Infected")
+
+    @openapi_view
+    async def upload_view(
+        upload=FileUploadTee(sinks=[sinks.DiskSink(tmp_path), FailingSink()])
+    ):
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/", upload_view)
+    client = await aiohttp_client(app)
+    resp = await client.post("/", data=b"x" * 100_000)
+    assert resp.status == 500
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_file_upload_tee_sink_names():
+    with pytest.raises(exceptions.UnacceptableSignature):
+        FileUploadTee(sinks=[sinks.SizeSink(), sinks.SizeSink()])
+    with pytest.raises(exceptions.UnacceptableSignature):
+        FileUploadTee(sinks=[])
+
+
+@openapi_view
+async def compressed_json_view(data=Json(dict, max_bytes=100_000)):
+    return web.json_response(data)
+
+
+@openapi_view
+async def compressed_text_view(text=Text()):
+    return web.json_response({"text": text})
+
+
+def make_compressed_app():
+    app = web.Application()
+    configure(app, decompress=True)
+    app.router.add_post("/json", compressed_json_view)
+    app.router.add_post("/text", compressed_text_view)
+    return app
+
+
+def _raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize(
+    "encoding, compress",
+    [
+        ("gzip", gzip.compress),
+        ("deflate", zlib.compress),
+        ("deflate", _raw_deflate),
+        ("identity", bytes),
+    ],
+)
+async def test_decompress_body(aiohttp_client, aiohttp_server, encoding, compress):
+    server = await aiohttp_server(make_compressed_app(), auto_decompress=False)
+    client = await aiohttp_client(server)
+    data = {"text": "compressed " * 1000}
+    body = compress(json.dumps(data).encode())
+    headers = {"Content-Encoding": encoding, "Content-Type": "application/json"}
+    resp = await client.post("/json", data=body, headers=headers)
+    assert await get_json(resp) == data
+    body = compress(data["text"].encode())
+    resp = await client.post("/text", data=body, headers=headers)
+    assert await get_json(resp) == data
+
+
+async def test_decompress_body_errors(aiohttp_client, aiohttp_server):
+    server = await aiohttp_server(make_compressed_app(), auto_decompress=False)
+    client = await aiohttp_client(server)
+    headers = {"Content-Encoding": "gzip"}
+    bomb = gzip.compress(b"[" + b" " * 10_000_000 + b"]")
+    resp = await client.post("/json", data=bomb, headers=headers)
+    errors = await get_json(resp, 413)
+    assert errors[0]["type"] == "PayloadTooLargeError"
+
+    truncated = gzip.compress(b'{"a": 1}')[:-10]
+    resp = await client.post("/json", data=truncated, headers=headers)
+    errors = await get_json(resp, 400)
+    assert errors[0]["msg"] == "Invalid gzip body: unexpected end of data"
+
+    resp = await client.post("/json", data=b"{}", headers={"Content-Encoding": "br"})
+    assert await get_json(resp, 415) == [
+        {
+            "in": "body (json)",
+            "loc": ["__root__"],
+            "msg": "Content-Encoding 'br' is not supported",
+            "type": "UnsupportedEncodingError",
+        }
+    ]
+
+
+async def test_decompress_max_size(aiohttp_client, aiohttp_server):
+    app = web.Application()
+    configure(app, decompress=True, max_decompressed_bytes=10_000)
+    app.router.add_post("/text", compressed_text_view)
+    server = await aiohttp_server(app, auto_decompress=False)
+    client = await aiohttp_client(server)
+    headers = {"Content-Encoding": "gzip"}
+    resp = await client.post(
+        "/text", data=gzip.compress(b"x" * 10_000), headers=headers
+    )
+    assert await get_json(resp) == {"text": "x" * 10_000}
+    bomb = gzip.compress(b"x" * 10_000_000)
+    resp = await client.post("/text", data=bomb, headers=headers)
+    errors = await get_json(resp, 413)
+    assert errors[0]["msg"] == "Body is larger than 10000 bytes"
+
+
+def test_decompress_schema():
+    schema = make_schema(make_compressed_app(), title="Gzip", version="0.0.1").dict()
+    parameters = schema["paths"]["/json"]["post"]["parameters"]
+    assert parameters == [
+        {
+            "name": "Content-Encoding",
+            "in": "header",
+            "required": False,
+            "description": "Request body may be compressed",
+            "schema": {
+                "type": "string",
+                "enum": ["identity", "gzip", "x-gzip", "deflate"],
+            },
+        }
+    ]
+
+
+@openapi_view(content_type=("application/json", "application/msgpack"))
+async def negotiated_view(request: web.Request, note=Negotiated(Note)) -> Note:
+    return make_response(request, note, status=201)
+
+
+@openapi_view
+async def msgpack_view(note=MsgPack(Note)):
+    return web.json_response({"title": note.title})
+
+
+@pytest.fixture
+async def msgpack_client(aiohttp_client):
+    app = web.Application()
+    app.router.add_post("/negotiated", negotiated_view)
+    app.router.add_post("/msgpack", msgpack_view)
+    return await aiohttp_client(app)
+
+
+NOTE_DATA = {
+    "id": "5f3c3b6e-4d3a-4b8e-9b0a-1f5c0b1a2d3e",
+    "title": "packed",
+    "content": None,
+    "owner_id": 1,
+    "created": "2021-01-01T00:00:00",
+}
+
+
+@pytest.mark.parametrize(
+    "request_type, accept, response_type",
+    [
+        ("application/json", None, "application/json"),
+        ("application/msgpack", None, "application/msgpack"),
+        ("application/x-msgpack", "*/*", "application/msgpack"),
+        ("application/json", "application/msgpack", "application/msgpack"),
+        (
+            "application/msgpack",
+            "application/msgpack;q=0.5, application/json",
+            "application/json",
+        ),
+        ("application/msgpack", "text/html", "application/msgpack"),
+    ],
+)
+async def test_negotiated(msgpack_client, request_type, accept, response_type):
+    msgpack = pytest.importorskip("msgpack")
+    if "msgpack" in request_type:
+        body = msgpack.packb(NOTE_DATA)
+    else:
+        body = json.dumps(NOTE_DATA).encode()
+    headers = {"Content-Type": request_type}
+    if accept:
+        headers["Accept"] = accept
+    resp = await msgpack_client.post("/negotiated", data=body, headers=headers)
+    assert resp.status == 201
+    assert resp.content_type == response_type
+    if response_type == "application/msgpack":
+        data = msgpack.unpackb(await resp.read())
+    else:
+        data = await resp.json()
+    assert data == NOTE_DATA
+
+
+async def test_negotiated_errors(msgpack_client):
+    msgpack = pytest.importorskip("msgpack")
+    resp = await msgpack_client.post("/negotiated", data=b"<note/>")
+    assert await get_json(resp, 415) == [
+        {
+            "in": "body (json)",
+            "loc": ["__root__"],
+            "msg": (
+                "Content-Type 'application/octet-stream' is not supported, "
+                "expected one of application/json, application/msgpack"
+            ),
+            "type": "UnsupportedMediaTypeError",
+        }
+    ]
+    resp = await msgpack_client.post("/msgpack", data=msgpack.packb({"title": 1}))
+    errors = await get_json(resp, 400)
+    assert {e["in"] for e in errors} == {"body (msgpack)"}
+    resp = await msgpack_client.post("/msgpack", data=b"\xc1")
+    errors = await get_json(resp, 400)
+    assert [(e["loc"], e["type"]) for e in errors] == [(["__root__"], "FormatError")]
+
+
+def test_negotiated_schema():
+    app = web.Application()
+    app.router.add_post("/", negotiated_view)
+    schema = make_schema(app, title="MessagePack", version="0.0.1").dict()
+    operation = schema["paths"]["/"]["post"]
+    note_schema = {"schema": {"$ref": "#/components/schemas/Note"}}
+    assert operation["requestBody"]["content"] == {
+        "application/json": note_schema,
+        "application/msgpack": note_schema,
+    }
+    assert operation["responses"]["200"]["content"] == {
+        "application/json": note_schema,
+        "application/msgpack": note_schema,
+    }
+
+
+NOTE = Note(
+    id=uuid.UUID(NOTE_DATA["id"]),
+    title="packed",
+    owner_id=1,
+    created=datetime.datetime(2021, 1, 1),
+)
+
+
+@pytest.fixture
+async def returning_client(aiohttp_client):
+    @openapi_view
+    async def model_view() -> Note:
+        return NOTE
+
+    @openapi_view(response_status=201)
+    async def list_view() -> t.List[Note]:
+        return [NOTE, NOTE]
+
+    @openapi_view
+    async def dict_view() -> dict:
+        return {"note": NOTE, "count": 1}
+
+    @openapi_view
+    async def none_view():
+        return None
+
+    @openapi_view
+    async def response_view() -> Note:
+        return web.Response(text="untouched", status=202)
+
+    @openapi_view(content_type=("application/json", "application/msgpack"))
+    async def negotiated_view() -> Note:
+        return NOTE
+
+    @openapi_view(content_type="application/zip")
+    async def zip_view():
+        return b"PK\x05\x06"
+
+    app = web.Application()
+    for path, view in [
+        ("/model", model_view),
+        ("/list", list_view),
+        ("/dict", dict_view),
+        ("/none", none_view),
+        ("/response", response_view),
+        ("/negotiated", negotiated_view),
+        ("/zip", zip_view),
+    ]:
+        app.router.add_get(path, view)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.parametrize(
+    "url, status, expected",
+    [
+        ("/model", 200, NOTE_DATA),
+        ("/list", 201, [NOTE_DATA, NOTE_DATA]),
+        ("/dict", 200, {"note": NOTE_DATA, "count": 1}),
+    ],
+)
+async def test_returned_value(returning_client, url, status, expected):
+    resp = await returning_client.get(url)
+    assert resp.content_type == "application/json"
+    assert await get_json(resp, status) == expected
+
+
+async def test_returned_response(returning_client):
+    resp = await returning_client.get("/none")
+    assert resp.status == 204
+    assert await resp.read() == b""
+    resp = await returning_client.get("/response")
+    assert resp.status == 202
+    assert await resp.text() == "untouched"
+    resp = await returning_client.get("/zip")
+    assert resp.content_type == "application/zip"
+    assert await resp.read() == b"PK\x05\x06"
+
+
+async def test_returned_value_negotiated(returning_client):
+    msgpack = pytest.importorskip("msgpack")
+    headers = {"Accept": "application/msgpack"}
+    resp = await returning_client.get("/negotiated", headers=headers)
+    assert resp.content_type == "application/msgpack"
+    assert msgpack.unpackb(await resp.read()) == NOTE_DATA
+
+
+@pytest.mark.parametrize("dumps", ["stdlib", "orjson"])
+async def test_json_dumps(aiohttp_client, dumps):
+    if dumps != "stdlib":
+        pytest.importorskip(dumps)
+
+    @openapi_view
+    async def model_view() -> Note:
+        return NOTE
+
+    app = web.Application()
+    configure(app, json_dumps=dumps)
+    app.router.add_get("/", model_view)
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert await get_json(resp) == NOTE_DATA
+
+
+def test_unknown_json_dumps():
+    with pytest.raises(ValueError):
+        configure(web.Application(), json_dumps="simplejson2")
+
+
+@openapi_view(content_type=("application/json", "application/x-ndjson"))
+async def stream_notes_view(count: int) -> t.AsyncIterator[Note]:
+    for _ in range(count):
+        yield NOTE
+
+
+@openapi_view(stream_flush_bytes=1)
+async def echo_stream_view(items=JsonStream(int)) -> t.AsyncIterator[int]:
+    async def double():
+        async for item in items:
+            yield item * 2
+
+    return double()
+
+
+@pytest.fixture
+async def streaming_client(aiohttp_client):
+    app = web.Application()
+    app.router.add_get("/notes", stream_notes_view)
+    app.router.add_post("/echo", echo_stream_view)
+    return await aiohttp_client(app)
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+async def test_stream_response_json(streaming_client, count):
+    resp = await streaming_client.get(f"/notes?count={count}")
+    assert resp.content_type == "application/json"
+    assert resp.headers["Transfer-Encoding"] == "chunked"
+    assert await get_json(resp) == [NOTE_DATA] * count
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+async def test_stream_response_ndjson(streaming_client, count):
+    headers = {"Accept": "application/x-ndjson"}
+    resp = await streaming_client.get(f"/notes?count={count}", headers=headers)
+    assert resp.content_type == "application/x-ndjson"
+    body = await resp.read()
+    assert body.endswith(b"\n") or not count
+    assert [json.loads(line) for line in body.splitlines()] == [NOTE_DATA] * count
+
+
+async def test_stream_response_flush(streaming_client):
+    resp = await streaming_client.post("/echo", data=b"[1, 2, 3]")
+    assert await get_json(resp) == [2, 4, 6]
+    # Error in the first item is reported before response is started
+    resp = await streaming_client.post("/echo", data=b'["a", 2]')
+    errors = await get_json(resp, 400)
+    assert [e["loc"] for e in errors] == [[0]]
+
+
+def test_stream_response_schema():
+    app = web.Application()
+    app.router.add_get("/", stream_notes_view)
+    schema = make_schema(app, title="Stream", version="0.0.1").dict()
+    expected = {
+        "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Note"}}
+    }
+    assert schema["paths"]["/"]["get"]["responses"]["200"]["content"] == {
+        "application/json": expected,
+        "application/x-ndjson": expected,
+    }
+
+
+@pytest.mark.parametrize("rate_level", ["app", "view"])
+async def test_validate_responses(aiohttp_client, caplog, rate_level):
+    view_rate = 1.0 if rate_level == "view" else None
+
+    @openapi_view(validate_responses=view_rate)
+    async def note_view(valid: bool) -> Note:
+        return NOTE if valid else {"title": "no id"}
+
+    @openapi_view
+    async def unchecked_view() -> Note:
+        return {"title": "no id"}
+
+    app = web.Application()
+    if rate_level == "app":
+        configure(app, validate_responses=1.0)
+    app.router.add_get("/", note_view)
+    app.router.add_get("/unchecked", unchecked_view)
+    client = await aiohttp_client(app)
+
+    validator = note_view.response_validator
+    resp = await client.get("/?valid=1")
+    assert await get_json(resp) == NOTE_DATA
+    assert (validator.validated, validator.failed) == (1, 0)
+
+    # Mismatch is logged, response is sent anyway
+    resp = await client.get("/?valid=0")
+    assert await get_json(resp) == {"title": "no id"}
+    assert (validator.validated, validator.failed) == (2, 1)
+    [record] = caplog.records
+    assert record.name == "aiohttp_openapi.responses"
+    assert "note_view" in record.getMessage()
+    caplog.clear()
+
+    resp = await client.get("/unchecked")
+    await get_json(resp)
+    expected = 1 if rate_level == "app" else 0
+    assert unchecked_view.response_validator.failed == expected
+    caplog.clear()
+
+
+def test_response_validator_types():
+    async def handler():
+        pass
+
+    for return_type in (None, web.Response, t.AsyncIterator[Note]):
+        assert responses.ResponseValidator.for_handler(handler, return_type) is None
+    validator = responses.ResponseValidator.for_handler(handler, t.List[Note])
+    assert validator.validate([NOTE, NOTE_DATA])
+
+
+@openapi_view(etag=True, max_age=60, vary=["Authorization"])
+async def cached_note_view() -> Note:
+    return NOTE
+
+
+@openapi_view(
+    content_type=("application/json", "application/msgpack"),
+    etag=lambda note: note.created.timestamp(),
+)
+async def versioned_note_view() -> Note:
+    return NOTE
+
+
+@pytest.fixture
+async def caching_client(aiohttp_client):
+    app = web.Application()
+    app.router.add_get("/cached", cached_note_view)
+    app.router.add_post("/cached", cached_note_view)
+    app.router.add_get("/versioned", versioned_note_view)
+    return await aiohttp_client(app)
+
+
+async def test_etag(caching_client):
+    resp = await caching_client.get("/cached")
+    assert await get_json(resp) == NOTE_DATA
+    etag = resp.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert resp.headers["Cache-Control"] == "max-age=60"
+    assert resp.headers["Vary"] == "Authorization"
+
+    resp = await caching_client.get("/cached", headers={"If-None-Match": etag})
+    assert resp.status == 304
+    assert await resp.read() == b""
+    assert resp.headers["ETag"] == etag
+    assert resp.headers["Cache-Control"] == "max-age=60"
+
+    resp = await caching_client.get("/cached", headers={"If-None-Match": '"old"'})
+    assert resp.status == 200
+    resp = await caching_client.post("/cached", headers={"If-None-Match": etag})
+    assert resp.status == 200
+    assert "ETag" not in resp.headers
+
+
+async def test_etag_version(caching_client):
+    resp = await caching_client.get("/versioned")
+    await get_json(resp)
+    etag = resp.headers["ETag"]
+    assert etag == f'W/"{NOTE.created.timestamp()}"'
+    assert resp.headers["Vary"] == "Accept"
+    assert "Cache-Control" not in resp.headers
+    for if_none_match in (etag, etag[2:], "*", f'"old", {etag}'):
+        headers = {"If-None-Match": if_none_match}
+        resp = await caching_client.get("/versioned", headers=headers)
+        assert resp.status == 304
+
+
+def test_etag_schema():
+    app = web.Application()
+    app.router.add_get("/", cached_note_view, allow_head=False)
+    app.router.add_post("/", cached_note_view)
+    schema = make_schema(app, title="Cache", version="0.0.1").dict()
+    operation = schema["paths"]["/"]["get"]
+    assert operation["parameters"] == [
+        {
+            "name": "If-None-Match",
+            "in": "header",
+            "required": False,
+            "description": (
+                "ETag of cached response, 304 is returned if it is current"
+            ),
+            "schema": {"type": "string"},
+        }
+    ]
+    headers = {
+        "ETag": {"description": "Version of response", "schema": {"type": "string"}},
+        "Cache-Control": {"schema": {"type": "string"}, "example": "max-age=60"},
+        "Vary": {"schema": {"type": "string"}, "example": "Authorization"},
+    }
+    assert operation["responses"]["200"]["headers"] == headers
+    assert operation["responses"]["304"] == {
+        "description": "Not modified since version in If-None-Match header",
+        "headers": headers,
+    }
+    # ETag is not used for other methods
+    operation = schema["paths"]["/"]["post"]
+    assert operation["parameters"] == []
+    assert list(operation["responses"]) == ["200"]
+    del headers["ETag"]
+    assert operation["responses"]["200"]["headers"] == headers
+
+
+@pytest.fixture
+async def compressing_client(aiohttp_client):
+    @openapi_view
+    async def notes_view(count: int) -> t.List[Note]:
+        return [NOTE] * count
+
+    @openapi_view(compression=CompressionPolicy(encodings=("deflate",), level=9))
+    async def deflate_view() -> t.List[Note]:
+        return [NOTE] * 100
+
+    @openapi_view(compression=False)
+    async def plain_view() -> t.List[Note]:
+        return [NOTE] * 100
+
+    @openapi_view(etag=True)
+    async def cached_view() -> t.List[Note]:
+        return [NOTE] * 100
+
+    @openapi_view
+    async def stream_view() -> t.AsyncIterator[Note]:
+        for _ in range(100):
+            yield NOTE
+
+    app = web.Application()
+    configure(app, compression=CompressionPolicy(executor_bytes=10_000))
+    app.router.add_get("/notes", notes_view)
+    app.router.add_get("/deflate", deflate_view)
+    app.router.add_get("/plain", plain_view)
+    app.router.add_get("/cached", cached_view)
+    app.router.add_get("/stream", stream_view)
+    return await aiohttp_client(app, auto_decompress=False)
+
+
+@pytest.mark.parametrize("count", [1, 10, 1000])  # small, inline, in executor
+async def test_compressed_response(compressing_client, count):
+    headers = {"Accept-Encoding": "deflate;q=0.5, gzip"}
+    resp = await compressing_client.get(f"/notes?count={count}", headers=headers)
+    assert resp.status == 200
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    body = await resp.read()
+    if count == 1:
+        assert "Content-Encoding" not in resp.headers
+    else:
+        assert resp.headers["Content-Encoding"] == "gzip"
+        body = gzip.decompress(body)
+    assert json.loads(body) == [NOTE_DATA] * count
+
+    headers = {"Accept-Encoding": "identity"}
+    resp = await compressing_client.get(f"/notes?count={count}", headers=headers)
+    assert "Content-Encoding" not in resp.headers
+    assert json.loads(await resp.read()) == [NOTE_DATA] * count
+
+
+async def test_compression_policy(compressing_client):
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    resp = await compressing_client.get("/deflate", headers=headers)
+    assert resp.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(await resp.read())) == [NOTE_DATA] * 100
+    resp = await compressing_client.get("/plain", headers=headers)
+    assert "Content-Encoding" not in resp.headers
+    assert "Vary" not in resp.headers
+
+    # ETag is weak, compressed and plain bodies are the same version
+    resp = await compressing_client.get("/cached", headers=headers)
+    assert resp.headers["Content-Encoding"] == "gzip"
+    etag = resp.headers["ETag"]
+    assert etag.startswith("W/")
+    headers["If-None-Match"] = etag
+    resp = await compressing_client.get("/cached", headers=headers)
+    assert resp.status == 304
+    assert resp.headers["Vary"] == "Accept-Encoding"
+
+    resp = await compressing_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(await resp.read())) == [NOTE_DATA] * 100
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("gzip;q=0, *", "deflate"),
+        ("*, gzip;q=0", "deflate"),
+        ("*;q=0.5, deflate", "deflate"),
+        ("gzip;q=0, deflate;q=0, *", None),
+    ],
+)
+async def test_compression_wildcard(compressing_client, accept_encoding, encoding):
+    headers = {"Accept-Encoding": accept_encoding}
+    resp = await compressing_client.get("/notes?count=100", headers=headers)
+    assert resp.headers.get("Content-Encoding") == encoding
+
+
+async def test_cached_response_compression(aiohttp_client, monkeypatch):
+    notes_cache = TTLCache()
+    compressed = []
+    compress_body = compression.compress_body
+
+    async def record_compression(body, encoding, policy):
+        compressed.append(encoding)
+        return await compress_body(body, encoding, policy)
+
+    monkeypatch.setattr(compression, "compress_body", record_compression)
+
+    @openapi_view(cache=notes_cache, compression=True)
+    async def notes_view(count: int) -> t.List[Note]:
+        return [NOTE] * count
+
+    app = web.Application()
+    app.router.add_get("/", notes_view)
+    client = await aiohttp_client(app, auto_decompress=False)
+    for accept_encoding in ("gzip", "gzip", "deflate", "identity", "deflate"):
+        headers = {"Accept-Encoding": accept_encoding}
+        resp = await client.get("/?count=100", headers=headers)
+        assert resp.headers.get("Content-Encoding", "identity") == accept_encoding
+        body = await resp.read()
+        if accept_encoding != "identity":
+            body = zlib.decompress(body, 32 + zlib.MAX_WBITS)  # gzip or zlib
+        assert json.loads(body) == [NOTE_DATA] * 100
+    # Each encoding is compressed once, and removed with response
+    assert compressed == ["gzip", "deflate"]
+    assert notes_cache.invalidate(notes_view, count=100) == 3
+
+
+def test_unknown_compression_encoding():
+    with pytest.raises(ValueError):
+        CompressionPolicy(encodings=("br",))
+
+
+async def test_response_cache(aiohttp_client):
+    notes_cache = TTLCache(maxsize=2)
+    calls = []
+
+    @openapi_view(cache=notes_cache, etag=True)
+    async def note_view(owner_id: int, tags=Param(t.List[str], [])) -> Note:
+        calls.append(owner_id)
+        return NOTE.copy(update={"owner_id": owner_id})
+
+    app = web.Application()
+    app.router.add_get("/", note_view)
+    app.router.add_post("/", note_view)
+    client = await aiohttp_client(app)
+
+    for _ in range(2):
+        resp = await client.get("/?owner_id=1&tags=a&tags=b")
+        assert await get_json(resp) == {**NOTE_DATA, "owner_id": 1}
+    assert calls == [1]
+    assert notes_cache.stats == CacheStats(
+        hits=1, misses=1, evictions=0, size=1, bytes=len(await resp.read())
+    )
+    resp = await client.get(
+        "/?owner_id=1&tags=a&tags=b", headers={"If-None-Match": resp.headers["ETag"]}
+    )
+    assert resp.status == 304
+
+    # POST is not cached, LRU entry is evicted
+    await client.post("/?owner_id=1")
+    await client.get("/?owner_id=2")
+    await client.get("/?owner_id=3")
+    assert calls == [1, 1, 2, 3]
+    assert notes_cache.evictions == 1
+    await client.get("/?owner_id=1&tags=a&tags=b")
+    assert calls == [1, 1, 2, 3, 1]
+
+    assert notes_cache.invalidate(note_view, owner_id=2) == 0  # evicted
+    assert notes_cache.invalidate(note_view, owner_id=3) == 1
+    assert notes_cache.invalidate(note_view) == 1
+    assert len(notes_cache) == 0
+
+
+async def test_response_cache_limits(aiohttp_client):
+    ttl_cache = TTLCache(ttl=0)
+    bytes_cache = TTLCache(max_bytes=300)
+    calls = []
+
+    @openapi_view(cache=ttl_cache)
+    async def expiring_view() -> Note:
+        calls.append("expiring")
+        return NOTE
+
+    @openapi_view(
+        cache=bytes_cache, content_type=("application/json", "application/msgpack")
+    )
+    async def notes_view(count: int) -> t.List[Note]:
+        calls.append(count)
+        return [NOTE] * count
+
+    app = web.Application()
+    app.router.add_get("/expiring", expiring_view)
+    app.router.add_get("/notes", notes_view)
+    client = await aiohttp_client(app)
+
+    await client.get("/expiring")
+    await client.get("/expiring")
+    assert calls == ["expiring", "expiring"]
+    assert ttl_cache.stats.misses == 2
+    calls.clear()
+
+    await client.get("/notes?count=10")  # too large to be cached
+    await client.get("/notes?count=10")
+    assert calls == [10, 10]
+    assert len(bytes_cache) == 0
+    for _ in range(2):
+        resp = await client.get("/notes?count=1")
+        assert resp.content_type == "application/json"
+    assert calls == [10, 10, 1]
+
+    # Formats are cached separately
+    msgpack = pytest.importorskip("msgpack")
+    for _ in range(2):
+        headers = {"Accept": "application/msgpack"}
+        resp = await client.get("/notes?count=1", headers=headers)
+        assert resp.content_type == "application/msgpack"
+        assert msgpack.unpackb(await resp.read()) == [NOTE_DATA]
+    assert calls == [10, 10, 1, 1]
+    assert len(bytes_cache) == 2
+
+
+def test_cache_requires_handler_without_request():
+    async def handler(request, owner_id: int) -> Note:
+        return NOTE
+
+    with pytest.raises(exceptions.UnacceptableSignature):
+        openapi_view(cache=TTLCache())(handler)
+
+
+def test_cache_key():
+    async def handler():
+        yield NOTE
+
+    key = cache.make_key(handler, {"ids": [1, 2], "note": NOTE, "params": {"a": 1}})
+    assert key == cache.make_key(
+        handler, {"ids": [1, 2], "note": NOTE.copy(), "params": {"a": 1}}
+    )
+    assert cache.make_key(handler, {"body": JsonStream(int)}) is not None
+    assert cache.make_key(handler, {"items": handler()}) is None
+    with pytest.raises(ValueError):
+        TTLCache().invalidate(handler)
+
+
+async def shared_note_view(owner_id: int, count: int = 1) -> t.List[Note]:
+    shared_note_view.calls.append(owner_id)
+    return [NOTE.copy(update={"owner_id": owner_id})] * count
+
+
+async def test_shared_memory_cache(aiohttp_client, tmp_path):
+    shared_cache = SharedMemoryCache(tmp_path / "cache", slots=8, slot_size=512)
+    calls = shared_note_view.calls = []
+    # SharedMemoryCache accepts only handlers defined at module level
+    note_view = openapi_view(cache=shared_cache)(shared_note_view)
+
+    app = web.Application()
+    app.router.add_get("/", note_view)
+    client = await aiohttp_client(app)
+
+    for _ in range(2):
+        resp = await client.get("/?owner_id=1")
+        assert await get_json(resp) == [{**NOTE_DATA, "owner_id": 1}]
+        assert resp.content_type == "application/json"
+    assert calls == [1]
+    assert shared_cache.stats == CacheStats(
+        hits=1, misses=1, evictions=0, size=1, bytes=len(await resp.read())
+    )
+
+    # Cache of other worker maps the same slots
+    other_cache = SharedMemoryCache(tmp_path / "cache", slots=8, slot_size=512)
+    key = cache.make_key(note_view.__wrapped__, {"owner_id": 1, "count": 1})
+    assert other_cache.get(key).body == await resp.read()
+    assert other_cache.invalidate(note_view, owner_id=1, count=2) == 0
+    assert other_cache.invalidate(note_view, owner_id=1, count=1) == 1
+    await client.get("/?owner_id=1")
+    assert calls == [1, 1]
+
+    await client.get("/?owner_id=2&count=10")  # larger than slot
+    await client.get("/?owner_id=2&count=10")
+    assert calls == [1, 1, 2, 2]
+    other_cache.clear()
+    assert shared_cache.stats.size == 0
+    with pytest.raises(ValueError):
+        SharedMemoryCache(tmp_path / "cache", slots=16, slot_size=512)
+    other_cache.close()
+    shared_cache.close()
+
+
+def test_shared_memory_cache_unstable_keys(tmp_path):
+    shared_cache = SharedMemoryCache(tmp_path / "cache", slots=8, slot_size=512)
+
+    def make_view(model):
+        async def view(id: int) -> model: ...
+
+        return view
+
+    # Views made by one factory have the same name
+    with pytest.raises(exceptions.UnacceptableSignature):
+        openapi_view(cache=shared_cache)(make_view(Note))
+
+    class Filter:
+        pass
+
+    key = cache.make_key(shared_note_view, {"filter": Filter()})
+    with pytest.raises(exceptions.UnacceptableSignature):
+        shared_cache.get(key)
+    key = cache.make_key(
+        shared_note_view,
+        {"id": uuid.UUID(int=1), "day": datetime.date(2020, 1, 1), "note": NOTE},
+    )
+    assert shared_cache.get(key) is None
+    shared_cache.close()
+
+
+def _fill_shared_cache(path, owner_ids):
+    shared_cache = SharedMemoryCache(path, slots=2, slot_size=256, ways=2)
+    for owner_id in owner_ids:
+        key = cache.make_key(_fill_shared_cache, {"owner_id": owner_id})
+        shared_cache.set(key, cache.CachedResponse(200, b"%d" % owner_id, ()))
+    shared_cache.close()
+
+
+def test_shared_memory_cache_processes(tmp_path):
+    path = tmp_path / "cache"
+    shared_cache = SharedMemoryCache(path, slots=2, slot_size=256, ways=2)
+    worker = multiprocessing.get_context("fork").Process(
+        target=_fill_shared_cache, args=(path, [1, 2])
+    )
+    worker.start()
+    worker.join()
+    assert worker.exitcode == 0
+
+    def get(owner_id):
+        key = cache.make_key(_fill_shared_cache, {"owner_id": owner_id})
+        return shared_cache.get(key)
+
+    assert get(1) == cache.CachedResponse(200, b"1", ())
+    assert get(2).body == b"2"
+    # Bucket is full, the least recently used response is evicted
+    get(1)
+    _fill_shared_cache(path, [3])
+    assert get(2) is None
+    assert get(1).body == b"1"
+    assert get(3).body == b"3"
+    shared_cache.close()
+
+
+async def test_coalesce(aiohttp_client):
+    notes_cache = TTLCache()
+    release = asyncio.Event()
+    calls = []
+
+    @openapi_view(coalesce=True, cache=notes_cache, etag=True)
+    async def note_view(owner_id: int) -> Note:
+        calls.append(owner_id)
+        await release.wait()
+        return NOTE.copy(update={"owner_id": owner_id})
+
+    @openapi_view(coalesce=True)
+    async def notes_view(count: int) -> t.AsyncIterator[Note]:
+        calls.append(count)
+        await release.wait()
+        for _ in range(count):
+            yield NOTE
+
+    app = web.Application()
+    app.router.add_get("/note", note_view)
+    app.router.add_get("/notes", notes_view)
+    app.router.add_post("/note", note_view)
+    client = await aiohttp_client(app)
+
+    requests = [client.get("/note?owner_id=1") for _ in range(5)]
+    requests += [client.get("/note?owner_id=2"), client.post("/note?owner_id=1")]
+    requests += [client.get("/notes?count=2") for _ in range(2)]
+    requests = [asyncio.ensure_future(request) for request in requests]
+    while len(calls) < 4:
+        await asyncio.sleep(0.01)
+    release.set()
+    responses_ = await asyncio.gather(*requests)
+    # Streamed response can not be shared, it is made for every request
+    assert sorted(calls) == [1, 1, 2, 2, 2]
+    bodies = [await get_json(resp) for resp in responses_]
+    assert bodies[:5] == [{**NOTE_DATA, "owner_id": 1}] * 5
+    assert bodies[5] == {**NOTE_DATA, "owner_id": 2}
+    assert bodies[7:] == [[NOTE_DATA] * 2] * 2
+    assert len({resp.headers["ETag"] for resp in responses_[:5]}) == 1
+    assert len(note_view.__wrapped__.meta.cache) == 2
+    resp = await client.get(
+        "/note?owner_id=1", headers={"If-None-Match": responses_[0].headers["ETag"]}
+    )
+    assert resp.status == 304
+
+
+async def test_single_flight():
+    flights = cache.SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.ensure_future(flights.run("key", call))
+    follower = asyncio.ensure_future(flights.run("key", call))
+    await asyncio.sleep(0.01)
+    # Cancelled caller that started flight does not cancel others
+    leader.cancel()
+    assert await follower == ("done", False)
+    assert leader.cancelled()
+    assert calls == [1] and len(flights) == 0
+
+    # Flight is cancelled when nobody waits for it, next call starts new one
+    waiter = asyncio.ensure_future(flights.run("key", call))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    assert len(flights) == 0
+    assert await flights.run("key", call) == ("done", True)
+    assert calls == [1, 1, 1]
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("database is down")
+
+    results = await asyncio.gather(
+        flights.run("fail", fail), flights.run("fail", fail), return_exceptions=True
+    )
+    assert [type(result) for result in results] == [ConnectionError] * 2
+
+
+async def test_coalesce_empty_and_http_errors(aiohttp_client):
+    calls = []
+
+    @openapi_view(coalesce=True)
+    async def touch_view(id: int) -> None:
+        calls.append(id)
+        await asyncio.sleep(0.05)
+        if id == 0:
+            raise web.HTTPNotFound(text="No such note")
+
+    app = web.Application()
+    app.router.add_get("/", touch_view)
+    client = await aiohttp_client(app)
+
+    responses_ = await asyncio.gather(*(client.get("/?id=1") for _ in range(3)))
+    assert [resp.status for resp in responses_] == [204] * 3
+    assert calls == [1]
+
+    # Every request gets its own error response
+    responses_ = await asyncio.wait_for(
+        asyncio.gather(*(client.get("/?id=0") for _ in range(3))), timeout=5
+    )
+    assert [resp.status for resp in responses_] == [404] * 3
+    assert [await resp.text() for resp in responses_] == ["No such note"] * 3
+
+
+def test_coalesce_requires_handler_without_request():
+    async def handler(request, owner_id: int) -> Note:
+        return NOTE
+
+    with pytest.raises(exceptions.UnacceptableSignature):
+        openapi_view(coalesce=True)(handler)
@@ -1,4 +1,5 @@
 import datetime
+import gzip
 import json
 import tempfile
 import uuid
@@ -15,7 +16,7 @@ try:
 except ImportError:
     from openapi_spec_validator import openapi_v3_spec_validator as validator
 
-from aiohttp_openapi import exceptions
+from aiohttp_openapi import CompressionPolicy, configure, exceptions
 from aiohttp_openapi.main import publish_schema
 from aiohttp_openapi.openapi.schema import make_schema
 from aiohttp_openapi.parser.decorators import openapi_view
@@ -164,3 +165,25 @@ async def test_raises_when_unmatched_path_param():
         except Exception as e:
             print(repr(e))
             raise
+
+
+async def test_published_schema_compressed(aiohttp_client):
+    app = web.Application()
+    configure(app, compression=CompressionPolicy(min_bytes=10))
+    publish_schema(app, title="Compressed API", version="0.0.1", url_path="/doc")
+    client = await aiohttp_client(app, auto_decompress=False)
+    bodies = []
+    for _ in range(2):
+        resp = await client.get(
+            "/doc/swagger.json", headers={"Accept-Encoding": "gzip"}
+        )
+        assert resp.status == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.headers["Vary"] == "Accept-Encoding"
+        bodies.append(await resp.read())
+    assert bodies[0] == bodies[1]
+    schema = json.loads(gzip.decompress(bodies[0]))
+    assert schema["info"]["title"] == "Compressed API"
+    resp = await client.get("/doc/swagger.json", headers={"Accept-Encoding": "br"})
+    assert "Content-Encoding" not in resp.headers
+    assert json.loads(await resp.read()) == schema